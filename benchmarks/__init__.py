@@ -0,0 +1,3 @@
+# 性能基准测试包
+# synthetic_panel：按合并表的结构和分布生成任意倍数规模的合成面板数据
+# run_benchmarks：对加载、省份提取、各类筛选、图表聚合和指数计算分阶段计时，结果写为 JSON
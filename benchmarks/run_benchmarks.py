@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import warnings
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from panel_data import load_panel, add_derived_columns, compact_panel
+from province_matcher import extract_province, province_column
+from panel_index import FilterEngine, SortIndex, summary_metrics
+from panel_cube import AggregateCube, CorrelationStats, INDEX_COLUMN, TECH_DIMENSIONS, MEASURE_COLUMNS
+from panel_export import XLSX_MAX_ROWS
+from classify_tech_keywords import build_index_table
+from benchmarks.synthetic_panel import BASE_DIR, load_template, generate_panel, write_workbook
+
+# 分阶段基准测试
+# 用法：python -m benchmarks.run_benchmarks --scales 1 10 100
+# 每个阶段重复 repeat 次，记录最短和中位耗时（秒）；结果连同提交号、环境版本写入 JSON，
+# 可用 --compare 与另一个提交的结果逐阶段对比。
+
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+
+
+def measure(fn, repeat):
+    # 返回 (最后一次的结果, 计时)
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, {'min': min(times), 'median': statistics.median(times), 'repeat': repeat}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def pick_query(df, rng):
+    # 每个规模使用同样规则抽取的查询条件：3 个年份、2 个行业、10 个股票代码、3 个企业名称片段
+    years = sorted(rng.choice(df['年份'].unique(), 3, replace=False).tolist())
+    industries = sorted(rng.choice(df['行业名称'].dropna().unique(), 2, replace=False).tolist())
+    codes = [str(code) for code in rng.choice(df['股票代码'].unique(), 10, replace=False)]
+    names = [str(name)[:2] for name in rng.choice(df['企业名称'].dropna().unique(), 3, replace=False)]
+    return {'years': years, 'industries': industries, 'stock_codes': codes, 'name_terms': names}
+
+
+def bench_scale(scale, template, repeat, seed, workbook, workdir):
+    timings = {}
+    info = {'scale': scale}
+
+    raw, info['generate_seconds'] = measure(lambda: generate_panel(scale, seed, template), 1)
+    info['generate_seconds'] = info['generate_seconds']['min']
+    info['rows'] = len(raw)
+    info['companies'] = int(raw['股票代码'].nunique())
+
+    # 加载：工作簿冷启动（写列式缓存）与读取列式缓存，只在行数不超过工作表上限时进行
+    if workbook and len(raw) < XLSX_MAX_ROWS:
+        path = os.path.join(workdir, f'panel_{scale}x.xlsx')
+        write_workbook(raw, path)
+        info['workbook_bytes'] = os.path.getsize(path)
+        _, timings['load_workbook_cold'] = measure(lambda: load_panel(path), 1)
+        _, timings['load_workbook_cached'] = measure(lambda: load_panel(path), repeat)
+    parquet_path = os.path.join(workdir, f'panel_{scale}x.parquet')
+    raw.to_parquet(parquet_path, index=False)
+    info['parquet_bytes'] = os.path.getsize(parquet_path)
+    _, timings['load_parquet'] = measure(lambda: pd.read_parquet(parquet_path), repeat)
+
+    # 省份提取：每次清空按名称的记忆化缓存，测的是完整提取
+    def extract():
+        extract_province.cache_clear()
+        return province_column(raw['企业名称'])
+    _, timings['province_extraction'] = measure(extract, repeat)
+    derived = add_derived_columns(raw)
+    (df, memory), timings['compact'] = measure(lambda: compact_panel(derived), repeat)
+    info['memory_before'] = memory['before']
+    info['memory_after'] = memory['after']
+
+    # 筛选
+    query = pick_query(df, np.random.default_rng(seed))
+    info['query'] = query
+    engine, timings['filter_index_build'] = measure(lambda: FilterEngine(df), repeat)
+    _, timings['filter_years'] = measure(lambda: engine.select(years=query['years']), repeat)
+    _, timings['filter_industries'] = measure(lambda: engine.select(industries=query['industries']), repeat)
+    _, timings['filter_stock_codes'] = measure(lambda: engine.select(stock_codes=query['stock_codes']), repeat)
+    _, timings['filter_name_terms'] = measure(lambda: engine.select(name_terms=query['name_terms']), repeat)
+    year_rows, timings['filter_combined'] = measure(
+        lambda: engine.select(years=query['years'], industries=query['industries']), repeat)
+    _, timings['summary_metrics_all'] = measure(lambda: summary_metrics(df, engine.all_rows), repeat)
+    _, timings['summary_metrics_filtered'] = measure(lambda: summary_metrics(df, year_rows), repeat)
+
+    # 数据表格排序分页
+    sort_index, timings['sort_index_build'] = measure(lambda: SortIndex(df), repeat)
+    _, timings['sort_page'] = measure(lambda: sort_index.page(year_rows, 1, 50, INDEX_COLUMN, True), repeat)
+
+    # 图表聚合：预聚合立方体与企业级筛选时使用的逐行计算
+    years, industries = query['years'], query['industries']
+    cube, timings['cube_build'] = measure(lambda: AggregateCube(df), repeat)
+    _, timings['chart_industry_means'] = measure(lambda: cube.industry_means(INDEX_COLUMN, years), repeat)
+    _, timings['chart_tech_means'] = measure(lambda: cube.measure_means(TECH_DIMENSIONS, years, industries), repeat)
+    _, timings['chart_year_means'] = measure(lambda: cube.year_means(MEASURE_COLUMNS, years), repeat)
+    _, timings['chart_province_stats'] = measure(lambda: cube.province_stats(INDEX_COLUMN, years), repeat)
+    corr_stats, timings['correlation_build'] = measure(lambda: CorrelationStats(df), repeat)
+    _, timings['chart_correlation'] = measure(lambda: corr_stats.corr(years), repeat)
+    filtered = df.iloc[year_rows]
+    _, timings['rowwise_industry_means'] = measure(
+        lambda: filtered.groupby('行业名称', observed=True)[INDEX_COLUMN].mean(), repeat)
+    _, timings['rowwise_correlation'] = measure(
+        lambda: filtered[list(corr_stats.columns)].corr(), repeat)
+
+    # 指数计算：逐年份标准化 + PCA；早期年份词频全为 0 时 PCA 会给出除零警告，不影响计时
+    year_tables = [group[['股票代码', '企业名称'] + TECH_DIMENSIONS + ['数字技术基础设施', '数字化应用场景']]
+                   for _, group in raw.groupby('年份')]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        _, timings['classify_pca_all_years'] = measure(
+            lambda: [build_index_table(table.copy()) for table in year_tables], repeat)
+
+    return {'info': info, 'timings': timings}
+
+
+def compare(old_path, new_result):
+    # 逐阶段对比两个结果文件（按最短耗时）
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    print(f"\n对比：{old['meta'].get('commit')} -> {new_result['meta'].get('commit')}")
+    for scale, new_scale in new_result['scales'].items():
+        old_scale = old['scales'].get(scale)
+        if old_scale is None:
+            continue
+        print(f'\n{scale}x')
+        for stage, timing in new_scale['timings'].items():
+            before = old_scale['timings'].get(stage)
+            if before is None:
+                continue
+            ratio = timing['min'] / before['min'] if before['min'] else float('inf')
+            flag = '  慢' if ratio > 1.2 else ''
+            print(f"  {stage:28s} {before['min']:10.4f} -> {timing['min']:10.4f} 秒  x{ratio:5.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='数字化转型指数分析平台分阶段基准测试')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='数据规模倍数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段的重复次数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--skip-workbook', action='store_true', help='不测试工作簿冷启动加载（生成大工作簿较慢）')
+    parser.add_argument('--output', help='结果文件，默认为 benchmarks/results/<提交号>.json')
+    parser.add_argument('--compare', help='与之前的结果文件逐阶段对比')
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    result = {
+        'meta': {
+            'commit': commit,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'scales': {},
+    }
+    template = load_template()
+    workdir = tempfile.mkdtemp(prefix='dt_bench_')
+    try:
+        for scale in args.scales:
+            print(f'正在测试 {scale}x ...')
+            scale_result = bench_scale(scale, template, args.repeat, args.seed, not args.skip_workbook, workdir)
+            result['scales'][str(scale)] = scale_result
+            info = scale_result['info']
+            print(f"  {info['rows']:,} 行，{info['companies']:,} 家企业")
+            for stage, timing in scale_result['timings'].items():
+                print(f"  {stage:28s} {timing['min']:10.4f} 秒（中位 {timing['median']:.4f}）")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{(commit or 'unknown')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f'\n结果已保存到：{output}')
+    if args.compare:
+        compare(args.compare, result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
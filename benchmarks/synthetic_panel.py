@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import pandas as pd
+from panel_data import load_panel
+from panel_export import write_xlsx
+
+# 合成面板数据生成
+# 以仓库中的合并表为模板：第 0 份副本就是原始数据，其余每份副本为全部企业换上新的股票代码和名称，
+# 技术维度词频按企业级和行级随机因子扰动后取整，总词频数重新求和；
+# 年份、行业（含缺失比例）、每家企业的年份跨度和指数分布都与原表一致。同一随机种子生成的数据完全相同。
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_PATH = os.path.join(BASE_DIR, '1999-2023年数字化转型指数与行业合并表.xlsx')
+
+# 合并表的列顺序
+PANEL_COLUMNS = ['股票代码', '年份', '企业名称', '数字化转型指数(0-100分)', '人工智能', '大数据', '云计算', '物联网',
+                 '区块链', '数字技术基础设施', '数字化应用场景', '总词频数', '行业代码', '行业名称']
+# 需要扰动的词频列，总词频数为它们之和
+COUNT_COLUMNS = ['人工智能', '大数据', '云计算', '物联网', '区块链', '数字技术基础设施', '数字化应用场景']
+
+
+def load_template(path=TEMPLATE_PATH):
+    # 读取模板并还原为工作簿中的原始列类型（去掉派生的省份列和紧凑化的类型）
+    df, _ = load_panel(path)
+    df = df[PANEL_COLUMNS].copy()
+    for col in ['企业名称', '行业代码', '行业名称']:
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+    for col in PANEL_COLUMNS:
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype(np.int64)
+    return df
+
+
+def generate_panel(scale, seed=0, template=None):
+    # 生成约 scale 倍模板行数的面板数据（scale 为正整数）
+    if template is None:
+        template = load_template()
+    scale = int(scale)
+    if scale < 1:
+        raise ValueError('scale 必须为正整数')
+    rng = np.random.default_rng(seed)
+    n_rows = len(template)
+    template_codes = template['股票代码'].to_numpy()
+    unique_codes, code_of_row = np.unique(template_codes, return_inverse=True)
+
+    # 新股票代码从未被模板占用的代码中随机抽取，保证全部唯一
+    needed = len(unique_codes) * (scale - 1)
+    upper = max(1000000, 2 * (needed + len(unique_codes)))
+    pool = np.setdiff1d(np.arange(1, upper), unique_codes)
+    new_codes = rng.permutation(pool)[:needed].reshape(scale - 1, len(unique_codes)) if needed else None
+
+    counts = template[COUNT_COLUMNS].to_numpy(dtype=np.float64)
+    parts = [template]
+    for replica in range(1, scale):
+        part = template.copy()
+        part['股票代码'] = new_codes[replica - 1][code_of_row]
+        part['企业名称'] = template['企业名称'].map(lambda name, r=replica: f'{name}{r}' if name is not None else None)
+        # 企业级因子保持同一企业各年份之间的相关性，行级因子增加年度波动
+        company_factor = rng.lognormal(0.0, 0.25, len(unique_codes))[code_of_row]
+        row_factor = rng.lognormal(0.0, 0.1, (n_rows, len(COUNT_COLUMNS)))
+        jittered = np.rint(counts * company_factor[:, None] * row_factor).astype(np.int64)
+        part[COUNT_COLUMNS] = jittered
+        part['总词频数'] = jittered.sum(axis=1)
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)[PANEL_COLUMNS]
+
+
+def write_workbook(df, path):
+    # 以工作簿格式写出（常量内存模式），供冷启动加载计时使用
+    with open(path, 'wb') as f:
+        write_xlsx(df, np.arange(len(df)), f)
@@ -0,0 +1,74 @@
+import io
+import threading
+from collections import OrderedDict
+from instrumentation import record_miss
+
+# 图表缓存模块
+# 按 (图表编号, 筛选条件签名) 缓存页面显示用的 PNG；300 dpi 的导出图只在用户点击下载时才生成并缓存。
+# 每张图绘制、编码完成后立即关闭，避免 matplotlib 的 Figure 随重新运行不断累积。
+
+# 与 st.pyplot 默认的保存参数一致，保证页面显示效果不变
+SCREEN_SAVEFIG_OPTIONS = {'format': 'png', 'dpi': 200, 'bbox_inches': 'tight'}
+EXPORT_SAVEFIG_OPTIONS = {'format': 'png', 'dpi': 300, 'bbox_inches': 'tight'}
+
+
+def render_png(draw, savefig_options):
+    # 调用 draw() 得到 Figure，编码为 PNG 字节后关闭
+    fig = draw()
+    # draw() 已经导入了 matplotlib，这里不会重复加载
+    import matplotlib.pyplot as plt
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, **savefig_options)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+class ChartImage:
+    # 单张图表的缓存项：draw 只依赖绑定好的数据，可以在任意时刻重新绘制
+
+    def __init__(self, draw, screen_png):
+        self.draw = draw
+        self.screen_png = screen_png
+        self._export_png = None
+        self._lock = threading.Lock()
+
+    def export_png(self):
+        # 供 st.download_button 的 data 回调使用：首次点击下载时才生成高分辨率图片
+        with self._lock:
+            if self._export_png is None:
+                self._export_png = render_png(self.draw, EXPORT_SAVEFIG_OPTIONS)
+            return self._export_png
+
+
+class ChartCache:
+    # 有界 LRU，进程内所有会话共享
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chart_id, signature, draw):
+        key = (chart_id, signature)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        record_miss()
+        entry = ChartImage(draw, render_png(draw, SCREEN_SAVEFIG_OPTIONS))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
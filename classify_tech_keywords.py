@@ -1,109 +1,520 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
+from sklearn.decomposition import PCA, IncrementalPCA
 import os
+import json
+import re
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import sys
-def main():
-    # 获取年份参数，默认为2023年
-    year = 2023
-    if len(sys.argv) > 1:
-        try:
-            year = int(sys.argv[1])
-        except ValueError:
-            print(f"警告：年份参数 '{sys.argv[1]}' 无效，将使用默认年份2023年")
-    
-    print(f'正在处理{year}年数据...')
-    
-    # 用户提供的技术关键词分类
-    keyword_categories = {
-        '人工智能': ['人工智能', '图像理解', '投资决策系统', '智能数据分析', '智能机器人', 
-                   '机器学习', '深度学习', '语义搜索', '语言识别', '身份验证', '自动驾驶',
-                   '自然语言处理', '神经网络', '卷积神经'],
-        '大数据': ['大数据', '数据挖掘', '文本挖掘', '数据可视化', '异构数据'],
-        '云计算': ['云计算', '流计算', '图计算', '内存计算', '安全计算',
-                  '类脑计算认知计算', '融合架构', 'EB级存储'],
-        '区块链': ['区块链', '分布式记账', '数字货币', '差分隐私技术', '智能金融合约', '加密货币'],
-        '数字技术应用': ['增强现实', '混合现实', '虚拟现实', '图像识别', '机器视觉', '雷达点云',
-                        '物联网', '信息物理系统', '机器通信', '移动互联网', '人工互联网', '无人工厂',
-                        '互联网医疗', '电子商务', '移动支付', '第三方支付', 'NFC支付', '智能能源',
-                        'B2B', 'B2C', 'C2B', 'C2C', 'O2O', '智能穿戴', '智慧农业', '智能交通',
-                        '智慧医疗', '智慧客服', '智能家居', '智能文旅', '智能环保', '智能电网',
-                        '智慧营销', '数字销售', '无人零售', '互联网金融', '数字金融', 'Fintech',
-                        '金融科技', '量化金融', '开放银行']
-    }
-    
-    # 读取数据文件
-    file_path = f'{year}年年报技术关键词统计.xlsx'
-    if not os.path.exists(file_path):
-        print(f'错误：文件 {file_path} 不存在')
-        return
-    
-    print(f'正在读取文件：{file_path}')
-    df = pd.read_excel(file_path)
-    
-    # 检查必要的列
-    required_columns = ['股票代码', '企业名称', '人工智能', '大数据', '云计算', '区块链', '物联网', '数字技术基础设施', '数字化应用场景']
-    for col in required_columns:
+from keyword_counter import CountCache, count_reports, list_reports
+
+# 输入、输出文件名模板
+INPUT_TEMPLATE = '{year}年年报技术关键词统计.xlsx'
+OUTPUT_TEMPLATE = '{year}年一级指标词频与数字化转型指数.xlsx'
+# 年报计数缓存的默认文件名（放在年报根目录下）
+COUNT_CACHE_NAME = 'keyword_counts.sqlite'
+# 从输入文件名中识别年份
+INPUT_PATTERN = re.compile(r'(\d{4})年年报技术关键词统计\.xlsx$')
+
+# 用户提供的技术关键词分类
+keyword_categories = {
+    '人工智能': ['人工智能', '图像理解', '投资决策系统', '智能数据分析', '智能机器人',
+               '机器学习', '深度学习', '语义搜索', '语言识别', '身份验证', '自动驾驶',
+               '自然语言处理', '神经网络', '卷积神经'],
+    '大数据': ['大数据', '数据挖掘', '文本挖掘', '数据可视化', '异构数据'],
+    '云计算': ['云计算', '流计算', '图计算', '内存计算', '安全计算',
+              '类脑计算认知计算', '融合架构', 'EB级存储'],
+    '区块链': ['区块链', '分布式记账', '数字货币', '差分隐私技术', '智能金融合约', '加密货币'],
+    '数字技术应用': ['增强现实', '混合现实', '虚拟现实', '图像识别', '机器视觉', '雷达点云',
+                    '物联网', '信息物理系统', '机器通信', '移动互联网', '人工互联网', '无人工厂',
+                    '互联网医疗', '电子商务', '移动支付', '第三方支付', 'NFC支付', '智能能源',
+                    'B2B', 'B2C', 'C2B', 'C2C', 'O2O', '智能穿戴', '智慧农业', '智能交通',
+                    '智慧医疗', '智慧客服', '智能家居', '智能文旅', '智能环保', '智能电网',
+                    '智慧营销', '数字销售', '无人零售', '互联网金融', '数字金融', 'Fintech',
+                    '金融科技', '量化金融', '开放银行']
+}
+
+# 计算所需的列
+required_columns = ['股票代码', '企业名称', '人工智能', '大数据', '云计算', '区块链', '物联网', '数字技术基础设施', '数字化应用场景']
+# 由年报文本直接计数得到的分类词频表的列（数字技术应用已是合计）
+category_columns = ['股票代码', '企业名称'] + list(keyword_categories)
+
+
+def technical_matrix(df):
+    # 检查必要的列，返回 (是否为分类词频表, 用于计算指数的技术指标列)
+    # 分类词频表（年报文本计数的结果）直接按 keyword_categories 的五个类别计算
+    from_categories = all(col in df.columns for col in category_columns)
+    for col in (category_columns if from_categories else required_columns):
         if col not in df.columns:
-            print(f'错误：缺少列 {col}')
-            return
-    
+            raise ValueError(f'缺少列 {col}')
+    if from_categories:
+        return True, list(keyword_categories)
+    # 用于计算的技术指标
+    return False, ['人工智能', '大数据', '云计算', '区块链', '物联网', '数字技术基础设施', '数字化应用场景']
+
+
+def build_result_table(df):
+    # 一级指标词频部分，数字化转型指数列留空；返回 (结果表, 技术指标矩阵)
+    from_categories, technical_columns = technical_matrix(df)
+
     # 确保股票代码为6位数格式
     df['股票代码'] = df['股票代码'].apply(lambda x: str(x).zfill(6) if isinstance(x, (str, int)) and str(x) != '未知' and len(str(x)) < 6 else x)
-    
+
     # 创建结果表结构
     result_columns = ['股票代码', '股票名称', '人工智能词频数', '大数据词频数', '云计算词频数', '区块链词频数', '数字技术应用词频数', '数字化转型指数']
     result_df = pd.DataFrame(columns=result_columns)
-    
+
     # 填充股票代码和名称
     result_df['股票代码'] = df['股票代码']
     result_df['股票名称'] = df['企业名称']
-    
+
     # 填充一级指标词频数
     result_df['人工智能词频数'] = df['人工智能'].fillna(0).astype(int)
     result_df['大数据词频数'] = df['大数据'].fillna(0).astype(int)
     result_df['云计算词频数'] = df['云计算'].fillna(0).astype(int)
     result_df['区块链词频数'] = df['区块链'].fillna(0).astype(int)
-    
-    # 数字技术应用 = 物联网 + 数字技术基础设施 + 数字化应用场景
-    result_df['数字技术应用词频数'] = (df['物联网'].fillna(0) + df['数字技术基础设施'].fillna(0) + df['数字化应用场景'].fillna(0)).astype(int)
-    
-    # 计算数字化转型指数（使用PCA方法，与原有代码保持一致）
-    # 用于计算的技术指标
-    technical_columns = ['人工智能', '大数据', '云计算', '区块链', '物联网', '数字技术基础设施', '数字化应用场景']
+
+    if from_categories:
+        result_df['数字技术应用词频数'] = df['数字技术应用'].fillna(0).astype(int)
+    else:
+        # 数字技术应用 = 物联网 + 数字技术基础设施 + 数字化应用场景
+        result_df['数字技术应用词频数'] = (df['物联网'].fillna(0) + df['数字技术基础设施'].fillna(0) + df['数字化应用场景'].fillna(0)).astype(int)
+
     X = df[technical_columns].fillna(0).values
-    
+    return result_df, X
+
+
+def build_index_table(df):
+    # 由关键词统计表计算一级指标词频与数字化转型指数（按年份单独拟合）
+    result_df, X = build_result_table(df)
+
+    # 计算数字化转型指数（使用PCA方法，与原有代码保持一致）
     # 数据标准化
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
-    
+
     # PCA分析
     pca = PCA()
     pca.fit(X_scaled)
     cumulative_variance = np.cumsum(pca.explained_variance_ratio_)
     n_components = np.argmax(cumulative_variance >= 0.85) + 1
-    
+
     pca = PCA(n_components=n_components)
     principal_components = pca.fit_transform(X_scaled)
     weights = np.sum(np.abs(pca.components_), axis=0)
     weights = weights / np.sum(weights)
-    
+
     # 计算指数值
     index_values = np.dot(X_scaled, weights)
     normalized_index = ((index_values - index_values.min()) / (index_values.max() - index_values.min()) * 100).round().astype(int)
-    
+
     result_df['数字化转型指数'] = normalized_index
-    
+    return result_df
+
+
+# 跨年份统一模型
+# 按年份分块依次 partial_fit 标准化参数和增量 PCA；每个年份的关键词统计表只读取、解析一次，
+# 原始表解析后即释放，只保留结果表和技术指标矩阵，拟合的几遍扫描和随后的打分都复用这份结果；
+# 权重、标准化参数和全体样本指数值的最小/最大值保存为 JSON，任何年份都按同一模型打分，指数跨年份可比。
+GLOBAL_MODEL_VERSION = 1
+
+
+def _read_year_matrix(year, input_dir):
+    file_path = os.path.join(input_dir, INPUT_TEMPLATE.format(year=year))
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f'文件 {file_path} 不存在')
+    df = pd.read_excel(file_path)
+    _, technical_columns = technical_matrix(df)
+    return df, technical_columns
+
+
+def _parse_year(year, input_dir):
+    # (结果表, float64 技术指标矩阵, 技术指标列)
+    df, technical_columns = _read_year_matrix(year, input_dir)
+    result_df, X = build_result_table(df)
+    return result_df, X.astype(np.float64), technical_columns
+
+
+class YearTables:
+    # 各年份关键词统计表的解析结果，每个年份只读取一次 Excel；读取失败的年份不缓存，异常直接抛出
+
+    def __init__(self, input_dir='.'):
+        self.input_dir = input_dir
+        self._parsed = {}
+
+    def get(self, year):
+        if year not in self._parsed:
+            self._parsed[year] = _parse_year(year, self.input_dir)
+        return self._parsed[year]
+
+    def pop(self, year):
+        # 最后一次使用：取出后不再保留
+        parsed = self._parsed.pop(year, None)
+        return parsed if parsed is not None else _parse_year(year, self.input_dir)
+
+
+def _year_batches(years, tables, technical_columns, scaler=None, min_rows=1):
+    # 逐年取技术指标矩阵；行数不足 min_rows 的年份与相邻年份合并成一块
+    held = None
+    pending = []
+    for year in years:
+        _, X, columns = tables.get(year)
+        if columns != technical_columns:
+            raise ValueError(f'{year}年关键词统计表的指标列与模型不一致')
+        pending.append(scaler.transform(X) if scaler is not None else X)
+        if sum(len(x) for x in pending) >= min_rows:
+            if held is not None:
+                yield held
+            held = np.vstack(pending)
+            pending = []
+    if pending:
+        held = np.vstack(pending if held is None else [held] + pending)
+    if held is not None:
+        yield held
+
+
+def fit_global_model(years, input_dir='.', tables=None):
+    # 三遍按年份分块扫描：标准化参数、增量 PCA、全体样本的指数值范围；
+    # tables 为 YearTables 时复用其中已解析的年份，解析结果留给随后的打分
+    tables = tables or YearTables(input_dir)
+    technical_columns = tables.get(years[0])[2]
+
+    scaler = StandardScaler()
+    for X in _year_batches(years, tables, technical_columns):
+        scaler.partial_fit(X)
+
+    # 保留全部主成分再按累计方差贡献率确定个数，与按年份计算时的规则一致
+    n_features = len(technical_columns)
+    if scaler.n_samples_seen_ < n_features:
+        raise ValueError(f'样本数不足 {n_features} 行，无法拟合主成分')
+    ipca = IncrementalPCA(n_components=n_features)
+    for X in _year_batches(years, tables, technical_columns, scaler, min_rows=n_features):
+        ipca.partial_fit(X)
+
+    cumulative_variance = np.cumsum(ipca.explained_variance_ratio_)
+    n_components = int(np.argmax(cumulative_variance >= 0.85) + 1)
+    weights = np.sum(np.abs(ipca.components_[:n_components]), axis=0)
+    weights = weights / np.sum(weights)
+
+    index_min, index_max = np.inf, -np.inf
+    for X in _year_batches(years, tables, technical_columns, scaler):
+        index_values = X @ weights
+        index_min = min(index_min, index_values.min())
+        index_max = max(index_max, index_values.max())
+
+    return {
+        'version': GLOBAL_MODEL_VERSION,
+        'fitted_at': datetime.now().isoformat(timespec='seconds'),
+        'years': [int(year) for year in years],
+        'n_samples': int(scaler.n_samples_seen_),
+        'technical_columns': technical_columns,
+        'mean': scaler.mean_.tolist(),
+        'scale': scaler.scale_.tolist(),
+        'explained_variance_ratio': ipca.explained_variance_ratio_.tolist(),
+        'n_components': n_components,
+        'weights': weights.tolist(),
+        'index_min': float(index_min),
+        'index_max': float(index_max),
+    }
+
+
+def save_model(model, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(model, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_model(path):
+    with open(path, encoding='utf-8') as f:
+        model = json.load(f)
+    if model.get('version') != GLOBAL_MODEL_VERSION:
+        raise ValueError(f'模型文件 {path} 的版本不受支持，请重新拟合')
+    return model
+
+
+def score_with_model(X, model):
+    # 按保存的模型打分：标准化 -> 加权求和 -> 按训练样本的指数范围映射到 0-100
+    X_scaled = (np.asarray(X, dtype=np.float64) - np.asarray(model['mean'])) / np.asarray(model['scale'])
+    index_values = X_scaled @ np.asarray(model['weights'])
+    span = model['index_max'] - model['index_min']
+    normalized = (index_values - model['index_min']) / span * 100 if span > 0 else np.zeros(len(index_values))
+    # 新年份可能超出训练样本范围，截断到 0-100
+    return np.clip(normalized, 0, 100).round().astype(int)
+
+
+def score_years(years, model, input_dir='.', output_dir='.', tables=None):
+    # 按同一模型为每个年份打分并写出结果文件；单个年份失败不影响其他年份
+    # tables 为拟合时用过的 YearTables，已解析的年份不再读取 Excel，打分后释放
+    tables = tables or YearTables(input_dir)
+    results = []
+    for year in years:
+        start = time.perf_counter()
+        try:
+            result_df, X, technical_columns = tables.pop(year)
+            if technical_columns != model['technical_columns']:
+                raise ValueError('关键词统计表的指标列与模型不一致')
+            result_df['数字化转型指数'] = score_with_model(X, model)
+            output_file = os.path.join(output_dir, OUTPUT_TEMPLATE.format(year=year))
+            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+                result_df.to_excel(writer, sheet_name='一级指标统计', index=False)
+            results.append({'year': year, 'ok': True, 'seconds': time.perf_counter() - start,
+                            'rows': len(result_df), 'output': output_file})
+        except Exception as e:
+            results.append({'year': year, 'ok': False, 'seconds': time.perf_counter() - start,
+                            'error': f'{type(e).__name__}: {e}'})
+    return results
+
+
+def count_year_reports(year, reports_dir, output_dir='.', workers=None, cache=None):
+    # 统计 reports_dir/{year}/ 下的全部年报文本，写出该年份的关键词统计表（分类词频）
+    report_dir = os.path.join(reports_dir, str(year))
+    paths = list_reports(report_dir)
+    if not paths:
+        raise FileNotFoundError(f'目录 {report_dir} 下没有年报文本文件')
+    start = time.perf_counter()
+    table, errors, cache_stats = count_reports(paths, keyword_categories, workers, cache=cache)
+    output_file = os.path.join(output_dir, INPUT_TEMPLATE.format(year=year))
+    table.to_excel(output_file, index=False)
+    return {'year': year, 'reports': len(paths), 'companies': len(table), 'errors': errors,
+            'cache': cache_stats, 'seconds': time.perf_counter() - start, 'output': output_file}
+
+
+def run_counting(years, reports_dir, output_dir='.', workers=None, cache_path=None):
+    # 逐个年份统计年报关键词（每个年份内部按年报并行），返回成功统计的年份
+    # cache_path 为 None 时不使用缓存，所有年报都重新计数
+    cache = CountCache(cache_path, keyword_categories) if cache_path else None
+    counted = []
+    try:
+        for year in years:
+            try:
+                info = count_year_reports(year, reports_dir, output_dir, workers, cache)
+            except Exception as e:
+                print(f'{year}年年报计数失败：{type(e).__name__}: {e}')
+                continue
+            hits, misses = info['cache']['hits'], info['cache']['misses']
+            cache_note = f"，缓存命中 {hits}/{hits + misses}（{hits / (hits + misses):.0%}）" if cache and hits + misses else ''
+            print(f"{year}年：{info['reports']} 份年报，{info['companies']} 家企业，"
+                  f"{info['seconds']:.2f} 秒{cache_note} -> {info['output']}")
+            for path, error in info['errors']:
+                print(f'  读取失败：{path}（{error}）')
+            counted.append(year)
+        if cache:
+            stats = cache.stats()
+            print(f"年报计数缓存：命中 {stats['hits']} 份，重新计数 {stats['misses']} 份，"
+                  f"命中率 {stats['hit_rate']:.1%}（{cache_path}）")
+    finally:
+        if cache:
+            cache.close()
+    return counted
+
+
+def years_from_reports(reports_dir):
+    # 年报目录下以年份命名的子目录
+    if not os.path.isdir(reports_dir):
+        return []
+    return sorted(int(name) for name in os.listdir(reports_dir)
+                  if re.fullmatch(r'\d{4}', name) and os.path.isdir(os.path.join(reports_dir, name)))
+
+
+def process_year(year, input_dir='.', output_dir='.', verbose=True):
+    # 处理单个年份：读取关键词统计表，计算指数并写出结果文件；失败时抛出异常
+    file_path = os.path.join(input_dir, INPUT_TEMPLATE.format(year=year))
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f'文件 {file_path} 不存在')
+
+    if verbose:
+        print(f'正在读取文件：{file_path}')
+    df = pd.read_excel(file_path)
+    result_df = build_index_table(df)
+
     # 保存结果
-    output_file = f'{year}年一级指标词频与数字化转型指数.xlsx'
+    output_file = os.path.join(output_dir, OUTPUT_TEMPLATE.format(year=year))
     with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
         result_df.to_excel(writer, sheet_name='一级指标统计', index=False)
-    
-    print(f'\n结果已保存到：{output_file}')
+    return {'rows': len(result_df), 'output': output_file}
+
+
+def _run_year(year, input_dir, output_dir):
+    # 进程池中的任务：捕获异常，单个年份失败不影响其他年份
+    start = time.perf_counter()
+    try:
+        info = process_year(year, input_dir, output_dir, verbose=False)
+        return {'year': year, 'ok': True, 'seconds': time.perf_counter() - start, **info}
+    except Exception as e:
+        return {'year': year, 'ok': False, 'seconds': time.perf_counter() - start, 'error': f'{type(e).__name__}: {e}'}
+
+
+def parse_years(spec):
+    # 年份范围："1999-2023"、"2019,2021,2023" 或两者组合
+    years = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = (int(v) for v in part.split('-', 1))
+            years.update(range(first, last + 1))
+        else:
+            years.add(int(part))
+    return sorted(years)
+
+
+def years_from_glob(pattern):
+    # 由匹配到的关键词统计文件名得到年份列表
+    years = set()
+    for path in glob.glob(pattern):
+        match = INPUT_PATTERN.search(os.path.basename(path))
+        if match:
+            years.add(int(match.group(1)))
+    return sorted(years)
+
+
+def run_batch(years, workers=None, input_dir='.', output_dir='.'):
+    # 多个年份在进程池中并行处理，结束后打印每个年份的耗时汇总
+    start = time.perf_counter()
+    results = []
+    if workers == 1 or len(years) <= 1:
+        results = [_run_year(year, input_dir, output_dir) for year in years]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_year, year, input_dir, output_dir): year for year in years}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 工作进程异常退出（如 BrokenProcessPool）时该年份记为失败，其余年份照常汇总
+                    result = {'year': futures[future], 'ok': False, 'seconds': time.perf_counter() - start,
+                              'error': f'{type(e).__name__}: {e}'}
+                status = '完成' if result['ok'] else '失败'
+                print(f"{result['year']}年{status}（{result['seconds']:.2f} 秒）")
+                results.append(result)
+    results.sort(key=lambda r: r['year'])
+    print_summary(results, start)
+    return results
+
+
+def run_global(years, input_dir='.', output_dir='.', fit_path=None, model_path=None):
+    # fit_path：跨年份拟合统一模型并保存；model_path：直接使用已保存的模型；随后为全部年份打分
+    start = time.perf_counter()
+    tables = YearTables(input_dir)
+    if fit_path:
+        print(f'跨年份拟合统一模型：{len(years)} 个年份')
+        model = fit_global_model(years, input_dir, tables)
+        save_model(model, fit_path)
+        print(f"模型已保存到：{fit_path}（{model['n_samples']} 个样本，{model['n_components']} 个主成分，"
+              f"拟合耗时 {time.perf_counter() - start:.2f} 秒）")
+    else:
+        model = load_model(model_path)
+        print(f"使用统一模型：{model_path}（拟合年份 {model['years'][0]}-{model['years'][-1]}）")
+    results = score_years(years, model, input_dir, output_dir, tables)
+    print_summary(results, start)
+    return results
+
+
+def print_summary(results, start):
+    # 打印每个年份的耗时与结果文件
+    print('\n各年份处理耗时：')
+    for result in results:
+        if result['ok']:
+            print(f"  {result['year']}年  {result['seconds']:8.2f} 秒  {result['rows']} 行  -> {result['output']}")
+        else:
+            print(f"  {result['year']}年  {result['seconds']:8.2f} 秒  失败：{result['error']}")
+    failed = [r['year'] for r in results if not r['ok']]
+    print(f'共 {len(results)} 个年份，成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个，'
+          f'总耗时 {time.perf_counter() - start:.2f} 秒')
+    if failed:
+        print(f"失败年份：{', '.join(str(year) for year in failed)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='计算一级指标词频与数字化转型指数')
+    parser.add_argument('year', nargs='?', help='单个年份，默认为2023年')
+    parser.add_argument('--years', help='批量处理的年份范围，例如 1999-2023 或 2019,2021')
+    parser.add_argument('--glob', help=f'批量处理匹配的关键词统计文件，例如 "*{INPUT_TEMPLATE.format(year="")}"')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数，默认为CPU核心数')
+    parser.add_argument('--reports', help='年报文本根目录（按年份分子目录，如 reports/2023/*.txt），先统计关键词再计算指数')
+    parser.add_argument('--cache', help=f'年报计数缓存文件，默认为年报根目录下的 {COUNT_CACHE_NAME}')
+    parser.add_argument('--no-cache', action='store_true', help='不使用年报计数缓存，全部重新计数')
+    parser.add_argument('--fit-global', metavar='MODEL', help='跨年份拟合统一的标准化与主成分模型并保存为 JSON，再按该模型为所有年份打分')
+    parser.add_argument('--model', help='使用已保存的统一模型为指定年份打分，不重新拟合')
+    parser.add_argument('--input-dir', default='.', help='关键词统计文件所在目录')
+    parser.add_argument('--output-dir', default='.', help='结果文件输出目录')
+    args = parser.parse_args(argv)
+
+    # 批量处理的年份
+    years = None
+    if args.years or args.glob:
+        years = set()
+        if args.years:
+            years.update(parse_years(args.years))
+        if args.glob:
+            years.update(years_from_glob(os.path.join(args.input_dir, args.glob)))
+        if not years:
+            print('错误：没有找到需要处理的年份')
+            return 1
+        years = sorted(years)
+
+    # 年报计数：统计结果写到 input-dir，随后按统计结果计算指数
+    all_counted = True
+    if args.reports:
+        if years is None:
+            years = [int(args.year)] if args.year is not None else years_from_reports(args.reports)
+        if not years:
+            print(f'错误：{args.reports} 下没有找到年份目录')
+            return 1
+        cache_path = None if args.no_cache else (args.cache or os.path.join(args.reports, COUNT_CACHE_NAME))
+        counted = run_counting(years, args.reports, args.input_dir, args.workers, cache_path)
+        if not counted:
+            return 1
+        all_counted = len(counted) == len(years)
+        years = counted
+
+    # 跨年份统一模型：拟合后（或直接读取已保存的模型）为所有年份打分
+    if args.fit_global or args.model:
+        if years is None:
+            if args.year is None:
+                print('错误：请指定年份（单个年份、--years 或 --glob）')
+                return 1
+            years = [int(args.year)]
+        try:
+            results = run_global(years, args.input_dir, args.output_dir, args.fit_global, args.model)
+        except (OSError, ValueError) as e:
+            print(f'错误：{e}')
+            return 1
+        return 0 if all_counted and all(r['ok'] for r in results) else 1
+
+    # 批量模式
+    if years is not None:
+        print(f"批量处理 {len(years)} 个年份：{years[0]}-{years[-1]}")
+        results = run_batch(years, args.workers, args.input_dir, args.output_dir)
+        return 0 if all_counted and all(r['ok'] for r in results) else 1
+
+    # 获取年份参数，默认为2023年
+    year = 2023
+    if args.year is not None:
+        try:
+            year = int(args.year)
+        except ValueError:
+            print(f"警告：年份参数 '{args.year}' 无效，将使用默认年份2023年")
+
+    print(f'正在处理{year}年数据...')
+
+    try:
+        info = process_year(year, args.input_dir, args.output_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(f'错误：{e}')
+        return 1
+
+    print(f"\n结果已保存到：{info['output']}")
     print('表结构：')
     print('股票代码, 股票名称, 人工智能词频数, 大数据词频数, 云计算词频数, 区块链词频数, 数字技术应用词频数, 数字化转型指数')
+    return 0
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
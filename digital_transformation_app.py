@@ -1,13 +1,17 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import uuid
 import numpy as np
-import folium
-from streamlit_folium import folium_static
-import plotly.express as px
-import io
+from functools import partial
+from panel_data import load_panel, panel_view
+from panel_index import SORT_COLUMNS, filter_key
+from panel_query import PanelQuery
+from panel_series import SERIES_COLUMNS
+from chart_cache import ChartCache
+from panel_export import EXPORT_FORMATS, XLSX_MAX_ROWS, export_rows
+import streamlit.components.v1 as components
+from geo_data import GEOJSON_PATH, build_province_map_html, load_geo_store
+from instrumentation import CACHE_HIT, CACHE_MISS, RunHistory, record_miss, memory_tracing_enabled, set_memory_tracing, start_run
 
 # 设置页面配置
 st.set_page_config(
@@ -17,9 +21,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
-plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
+# 分段计时的滚动历史，进程内所有会话共享
+@st.cache_resource
+def load_run_history():
+    return RunHistory(maxlen=200)
+
+# 本次运行的分段计时，运行结束后写入滚动历史
+if 'run_session_id' not in st.session_state:
+    st.session_state.run_session_id = uuid.uuid4().hex
+run_profiler = start_run(st.session_state.run_session_id)
 
 # 主题切换功能
 if 'theme' not in st.session_state:
@@ -191,76 +201,192 @@ with col2:
 # 使用os.path.abspath和相对路径确保文件路径的正确性
 file_path = os.path.abspath('1999-2023年数字化转型指数与行业合并表.xlsx')
 
-# 添加调试信息
-st.write(f"当前工作目录: {os.getcwd()}")
-st.write(f"文件路径: {file_path}")
-st.write(f"文件是否存在: {os.path.exists(file_path)}")
-
 # 数据加载函数
-@st.cache_data
-
+# 首次加载会在工作簿旁生成列式缓存，之后的冷启动直接读取缓存；省份等派生列在加载时一并计算
+# 面板在进程内只加载一次，所有会话共享同一个只读 DataFrame（不再像 cache_data 那样每次调用反序列化一份拷贝）；
+# 只读标记挡不住增删列等结构性修改，所以页面拿到的是它的浅拷贝（panel_view），共享面板只交给查询层
+@st.cache_resource
 def load_data():
+    record_miss()
     if os.path.exists(file_path):
-        df = pd.read_excel(file_path)
-        return df
+        return load_panel(file_path)
     else:
         st.error("数据文件不存在，请检查文件路径是否正确")
-        return None
+        return None, None
+
+# 查询层（筛选索引、结果缓存、排序置换、预聚合立方体等）只依赖数据内容，按数据哈希在进程内构建一次，
+# 所有会话共享；筛选和聚合都通过它完成，与本地 JSON 接口（panel_server.py）的结果一致
+@st.cache_resource
+def load_panel_query(data_hash, _df, _load_info):
+    record_miss()
+    return PanelQuery(_df, _load_info)
+
+# 数据表格每页行数选项
+PAGE_SIZE_OPTIONS = [20, 50, 100, 200]
+
+# 图表缓存（显示用图片和按需生成的导出图片），进程内所有会话共享
+@st.cache_resource
+def load_chart_cache(data_hash):
+    return ChartCache(maxsize=64)
+
+# 本地省份边界数据（含各档简化版本），每个进程只解析一次；不访问网络
+@st.cache_resource
+def load_province_geojson():
+    record_miss()
+    return load_geo_store(GEOJSON_PATH)
+
+# 地图默认缩放级别；页面上选择的缩放级别同时决定边界数据的简化精度
+MAP_ZOOM = 4
+MAP_ZOOM_RANGE = (3, 8)
+MAP_WIDTH = 1000
+MAP_HEIGHT = 600
+
+# 地图 HTML 按省份汇总数据（及边界数据版本、缩放级别）缓存，筛选结果不变时直接复用
+@st.cache_data(max_entries=32)
+def render_province_map(province_data, zoom, geo_hash):
+    record_miss()
+    return build_province_map_html(province_data, load_province_geojson(), zoom, height=MAP_HEIGHT)
+
+# matplotlib 和 seaborn 在第一次绘图时才导入，图表全部命中缓存时不需要加载；每个进程只导入、设置一次
+@st.cache_resource(show_spinner=False)
+def load_pyplot():
+    import matplotlib.pyplot as plt
+    # 设置中文字体
+    plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
+    plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
+    return plt
+
+@st.cache_resource(show_spinner=False)
+def load_seaborn():
+    load_pyplot()
+    import seaborn as sns
+    return sns
+
+# 图表绘制函数：只依赖传入的数据，图表缓存在需要显示或导出时调用
+def draw_industry_bar(industry_comparison):
+    plt, sns = load_pyplot(), load_seaborn()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.barplot(x='数字化转型指数(0-100分)', y='行业名称', data=industry_comparison, ax=ax)
+    ax.set_title('各行业平均数字化转型指数（前20名）', fontsize=16)
+    ax.set_xlabel('平均数字化转型指数', fontsize=12)
+    ax.set_ylabel('行业名称', fontsize=12)
+    return fig
+
+def draw_tech_bar(tech_avg):
+    plt, sns = load_pyplot(), load_seaborn()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.barplot(x='技术维度', y='平均得分', data=tech_avg, ax=ax, palette='viridis')
+    ax.set_title('各数字技术维度平均得分', fontsize=16)
+    ax.set_xlabel('技术维度', fontsize=12)
+    ax.set_ylabel('平均得分', fontsize=12)
+    return fig
+
+def radar_angles(tech_dimensions):
+    # 计算角度并闭合雷达图
+    angles = np.linspace(0, 2 * np.pi, len(tech_dimensions), endpoint=False).tolist()
+    return np.concatenate((angles, [angles[0]]))
+
+def draw_tech_radar(tech_dimensions, values):
+    angles = radar_angles(tech_dimensions)
+    # 闭合雷达图
+    values = np.concatenate((values, [values[0]]))
+    
+    # 创建雷达图
+    plt = load_pyplot()
+    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    ax.plot(angles, values, linewidth=2, linestyle='solid', label='平均得分')
+    ax.fill(angles, values, alpha=0.25)
+    
+    # 设置标签
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(tech_dimensions)
+    ax.set_yticklabels([])
+    ax.set_title('技术维度雷达图', fontsize=16)
+    ax.legend(loc='upper right')
+    return fig
+
+def draw_year_radar(tech_dimensions, year_values_list):
+    angles = radar_angles(tech_dimensions)
+    plt = load_pyplot()
+    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    
+    # 为每个年份绘制雷达图
+    for year, year_values in year_values_list:
+        # 闭合雷达图
+        year_values = np.concatenate((year_values, [year_values[0]]))
+        ax.plot(angles, year_values, linewidth=2, linestyle='solid', label=str(year))
+        ax.fill(angles, year_values, alpha=0.1)
+    
+    # 设置标签
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(tech_dimensions)
+    ax.set_yticklabels([])
+    ax.set_title('不同年份技术维度对比雷达图', fontsize=16)
+    ax.legend(loc='upper right')
+    return fig
+
+def draw_company_trend(trend_df, column):
+    plt = load_pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    
+    # 每家企业一条折线，某年没有数据时折线断开
+    for label in trend_df.columns:
+        ax.plot(trend_df.index, trend_df[label], marker='o', markersize=3, linewidth=1.5, label=label)
+    
+    ax.set_title(f'企业{column}逐年趋势', fontsize=16)
+    ax.set_xlabel('年份', fontsize=12)
+    ax.set_ylabel(column, fontsize=12)
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc='upper left', fontsize=9)
+    fig.tight_layout()
+    return fig
+
+def draw_corr_heatmap(corr_matrix):
+    plt, sns = load_pyplot(), load_seaborn()
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', linewidths=0.5, ax=ax)
+    ax.set_title('各维度相关性热力图', fontsize=16)
+    return fig
+
+def draw_province_bar(province_data):
+    plt = load_pyplot()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    
+    # 按平均数字化转型指数降序排序
+    sorted_province_data = province_data.sort_values('平均数字化转型指数', ascending=True)
+    
+    # 绘制条形图
+    bars = ax.barh(sorted_province_data['省份'], sorted_province_data['平均数字化转型指数'], 
+                   color=plt.cm.RdBu_r(sorted_province_data['平均数字化转型指数']/100))
+    
+    # 添加数值标签
+    for bar in bars:
+        width = bar.get_width()
+        ax.text(width + 1, bar.get_y() + bar.get_height()/2, 
+                f'{width:.1f}', ha='left', va='center', fontsize=10)
+    
+    # 设置图表属性
+    ax.set_title('各省份平均数字化转型指数分布', fontsize=16)
+    ax.set_xlabel('平均数字化转型指数(0-100分)', fontsize=12)
+    ax.set_xlim(0, 100)
+    ax.grid(True, alpha=0.3, axis='x')
+    
+    # 调整布局
+    fig.tight_layout()
+    return fig
 
 # 加载数据
-df = load_data()
-
-# 中国省份、城市和简称映射
-provinces_cities_mapping = {
-    # 省份和直辖市
-    '北京': '北京', '上海': '上海', '广东': '广东', '江苏': '江苏', '浙江': '浙江', '山东': '山东', 
-    '福建': '福建', '河南': '河南', '湖北': '湖北', '湖南': '湖南', '四川': '四川', '河北': '河北', 
-    '安徽': '安徽', '江西': '江西', '辽宁': '辽宁', '陕西': '陕西', '山西': '山西', '黑龙江': '黑龙江', 
-    '吉林': '吉林', '云南': '云南', '贵州': '贵州', '广西': '广西', '天津': '天津', '重庆': '重庆', 
-    '内蒙古': '内蒙古', '新疆': '新疆', '甘肃': '甘肃', '宁夏': '宁夏', '青海': '青海', '西藏': '西藏', 
-    '海南': '海南', '香港': '香港', '澳门': '澳门', '台湾': '台湾',
-    # 主要城市
-    '深圳': '广东', '广州': '广东', '杭州': '浙江', '南京': '江苏', '青岛': '山东', '济南': '山东',
-    '苏州': '江苏', '宁波': '浙江', '厦门': '福建', '福州': '福建', '成都': '四川', '武汉': '湖北',
-    '长沙': '湖南', '西安': '陕西', '郑州': '河南', '沈阳': '辽宁', '大连': '辽宁', '长春': '吉林',
-    '哈尔滨': '黑龙江', '合肥': '安徽', '南昌': '江西', '石家庄': '河北', '太原': '山西', '昆明': '云南',
-    '贵阳': '贵州', '南宁': '广西', '乌鲁木齐': '新疆', '兰州': '甘肃', '银川': '宁夏', '西宁': '青海',
-    '拉萨': '西藏', '海口': '海南', '三亚': '海南',
-    # 新增城市（根据数据分析结果）
-    '东莞': '广东', '佛山': '广东', '惠州': '广东', '中山': '广东', '珠海': '广东',
-    '无锡': '江苏', '徐州': '江苏', '常州': '江苏', '南通': '江苏', '连云港': '江苏',
-    '温州': '浙江', '绍兴': '浙江', '嘉兴': '浙江', '金华': '浙江', '台州': '浙江', '湖州': '浙江',
-    '泉州': '福建', '漳州': '福建', '莆田': '福建', '宁德': '福建', '龙岩': '福建',
-    '烟台': '山东', '潍坊': '山东', '淄博': '山东', '济宁': '山东', '泰安': '山东', '临沂': '山东',
-    '岳阳': '湖南', '衡阳': '湖南', '株洲': '湖南', '湘潭': '湖南', '常德': '湖南',
-    '沧州': '河北', '唐山': '河北', '保定': '河北', '廊坊': '河北', '承德': '河北',
-    '大同': '山西', '阳泉': '山西', '长治': '山西', '晋城': '山西', '临汾': '山西',
-    '乐山': '四川', '泸州': '四川', '德阳': '四川', '绵阳': '四川', '宜宾': '四川', '广安': '四川', '眉山': '四川',
-    '襄阳': '湖北', '宜昌': '湖北', '荆州': '湖北', '黄冈': '湖北',
-    '九江': '江西', '赣州': '江西', '上饶': '江西', '宜春': '江西',
-    '包头': '内蒙古', '呼和浩特': '内蒙古',
-    '洛阳': '河南', '开封': '河南', '新乡': '河南', '安阳': '河南',
-    '锦州': '辽宁', '营口': '辽宁',
-    '遵义': '贵州', '六盘水': '贵州',
-    '柳州': '广西', '桂林': '广西',
-    '曲靖': '云南', '玉溪': '云南',
-    '咸阳': '陕西', '宝鸡': '陕西',
-    '芜湖': '安徽', '马鞍山': '安徽',
-    '大庆': '黑龙江', '齐齐哈尔': '黑龙江',
-    '吉林': '吉林', '四平': '吉林'
-}
-
-# 从企业名称中提取省份信息
-def extract_province(company_name):
-    for city_province in provinces_cities_mapping:
-        if city_province in company_name:
-            return provinces_cities_mapping[city_province]
-    # 如果无法提取省份信息，返回默认省份
-    return '全国'
+with run_profiler.section('数据加载', cached=True) as load_timing:
+    shared_df, load_info = load_data()
+    # 每次运行使用共享面板的浅拷贝：不复制数据，页面代码即使增删列也不会影响其他会话
+    df = panel_view(shared_df) if shared_df is not None else None
 
 if df is not None:
-    # 从企业名称中提取省份信息
-    df['省份'] = df['企业名称'].apply(extract_province)
+    # 省份在加载数据时提取并随数据一起缓存，只有数据加载未命中缓存时才真正执行
+    if load_timing.cache == CACHE_MISS:
+        run_profiler.record('省份提取', load_info['stages']['derived'], CACHE_MISS)
+    else:
+        run_profiler.record('省份提取', 0.0, CACHE_HIT)
     
     # 侧边栏
     st.sidebar.header("🔍 数据筛选")
@@ -295,52 +421,43 @@ if df is not None:
     )
     
     # 数据筛选 - 优化逻辑：如果有股票代码或企业名称输入但没有选择年份，则显示所有年份数据
-    if not selected_years and (stock_codes or company_names):
-        # 如果用户没有选择年份，但输入了股票代码或企业名称，显示所有年份数据
-        filtered_df = df.copy()
-    else:
-        # 否则使用选择的年份筛选
-        filtered_df = df[df['年份'].isin(selected_years)]
+    # 处理用户输入的股票代码和企业名称，支持逗号分隔
+    stock_code_list = [code.strip() for code in stock_codes.split(',') if code.strip()]
+    company_name_list = [name.strip() for name in company_names.split(',') if name.strip()]
     
-    if selected_industries:
-        filtered_df = filtered_df[filtered_df['行业名称'].isin(selected_industries)]
+    # 年份、行业、股票代码、企业名称筛选通过倒排索引求交集，得到升序行号
+    filter_params = dict(
+        # 如果用户没有选择年份，但输入了股票代码或企业名称，显示所有年份数据
+        years=None if not selected_years and (stock_codes or company_names) else selected_years,
+        industries=selected_industries or None,
+        stock_codes=stock_code_list if stock_codes else None,
+        # 企业名称支持模糊匹配（不区分大小写）
+        name_terms=company_name_list if company_names else None
+    )
     
-    # 股票代码筛选
-    if stock_codes:
-        # 处理用户输入的股票代码，支持逗号分隔
-        stock_code_list = [code.strip() for code in stock_codes.split(',') if code.strip()]
-        # 筛选包含输入股票代码的行
-        filtered_df = filtered_df[filtered_df['股票代码'].astype(str).isin(stock_code_list)]
+    # 侧边栏状态未变（如切换主题、勾选调试信息）时直接复用缓存结果；
+    # 筛选行号和顶部指标分开缓存，以便分别计时
+    with run_profiler.section('数据筛选', cached=True):
+        panel_query = load_panel_query(load_info['sha256'], shared_df, load_info)
+        # 只保存升序行号，不复制选中的行；表格分页、导出和各项聚合都直接使用行号
+        filtered_rows = panel_query.select(**filter_params)
     
-    # 企业名称筛选
-    if company_names:
-        # 处理用户输入的企业名称，支持逗号分隔
-        company_name_list = [name.strip() for name in company_names.split(',') if name.strip()]
-        # 创建筛选条件
-        filter_condition = pd.Series([False]*len(filtered_df), index=filtered_df.index)
-        
-        # 对每个输入的企业名称进行模糊匹配
-        for name in company_name_list:
-            if name:
-                filter_condition = filter_condition | filtered_df['企业名称'].str.contains(name, case=False, na=False)
-        
-        # 应用筛选条件
-        filtered_df = filtered_df[filter_condition]
+    # 图表按 (图表编号, 筛选条件签名) 缓存，筛选条件不变时不再重新绘制
+    chart_cache = load_chart_cache(load_info['sha256'])
+    chart_signature = filter_key(**filter_params)
     
     # 主内容区
     # 无数据提示
-    if len(filtered_df) == 0:
+    if len(filtered_rows) == 0:
         st.warning("⚠️  没有找到匹配的数据")
         
         # 分析可能的原因
         reasons = []
         if stock_codes:
-            stock_code_list = [code.strip() for code in stock_codes.split(',') if code.strip()]
             # 检查股票代码是否在数据库中存在
-            all_years_data = df[df['股票代码'].astype(str).isin(stock_code_list)]
-            if len(all_years_data) > 0:
+            available_years = panel_query.years_of(stock_codes=stock_code_list)
+            if available_years:
                 # 检查是否是年份筛选的问题
-                available_years = sorted(all_years_data['年份'].unique())
                 reasons.append(f"输入的股票代码在所选年份范围内没有数据。该股票代码的可用年份为: {available_years}")
                 reasons.append(f"建议尝试手动选择其他年份来查看数据")
             else:
@@ -348,16 +465,11 @@ if df is not None:
                 reasons.append("请检查股票代码是否正确")
         
         if company_names:
-            company_name_list = [name.strip() for name in company_names.split(',') if name.strip()]
-            # 检查企业名称是否在数据库中存在
-            filter_condition = pd.Series([False]*len(df), index=df.index)
-            for name in company_name_list:
-                filter_condition |= df['企业名称'].str.contains(name, na=False)
-            all_years_data = df[filter_condition]
+            # 检查企业名称是否在数据库中存在（由名称索引直接给出匹配行及其年份）
+            available_years = panel_query.years_of(name_terms=company_name_list, ignore_case=False)
             
-            if len(all_years_data) > 0:
+            if available_years:
                 # 检查是否是年份筛选的问题
-                available_years = sorted(all_years_data['年份'].unique())
                 reasons.append(f"输入的企业名称在所选年份范围内没有数据。该企业的可用年份为: {available_years}")
                 reasons.append(f"建议尝试手动选择其他年份来查看数据")
             else:
@@ -375,89 +487,117 @@ if df is not None:
                 st.write(f"{i}. {reason}")
     
     # 调试信息（可选显示）
-    if st.checkbox("显示调试信息"):
+    show_debug = st.checkbox("显示调试信息")
+    if show_debug:
         st.subheader("调试信息")
+        st.write(f"数据文件: {file_path}")
         st.write(f"原始数据总行数: {len(df)}")
-        st.write(f"筛选后数据行数: {len(filtered_df)}")
+        st.write(f"筛选后数据行数: {len(filtered_rows)}")
         st.write(f"当前选择的年份: {selected_years}")
+        st.write(f"冷启动数据来源: {load_info['source']}，加载耗时: {load_info['seconds']:.3f} 秒")
+        st.write(f"数据内存占用: 紧凑化前 {load_info['memory']['before'] / 1024 / 1024:.2f} MB，"
+                 f"紧凑化后 {load_info['memory']['after'] / 1024 / 1024:.2f} MB（进程内所有会话共享一份）")
+        cache_stats = panel_query.cache.stats()
+        st.write(f"筛选结果缓存: 命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次，"
+                 f"当前 {cache_stats['size']}/{cache_stats['maxsize']} 条")
+        chart_stats = chart_cache.stats()
+        st.write(f"图表缓存: 命中 {chart_stats['hits']} 次，未命中 {chart_stats['misses']} 次，"
+                 f"当前 {chart_stats['size']}/{chart_stats['maxsize']} 张")
         
         if stock_codes:
-            stock_code_list = [code.strip() for code in stock_codes.split(',') if code.strip()]
             st.write(f"输入的股票代码: {stock_code_list}")
-            st.write(f"匹配到的股票代码: {list(filtered_df['股票代码'].unique())}")
+            st.write(f"匹配到的股票代码: {list(df['股票代码'].array.take(filtered_rows).unique())}")
             
             # 检查股票代码在所有年份的数据情况
-            all_years_data = df[df['股票代码'].astype(str).isin(stock_code_list)]
-            if len(all_years_data) > 0:
-                available_years = sorted(all_years_data['年份'].unique())
+            available_years = panel_query.years_of(stock_codes=stock_code_list)
+            if available_years:
                 st.write(f"股票代码在数据库中的可用年份: {available_years}")
-                st.write(f"所选年份范围内的数据行数: {len(filtered_df)}")
+                st.write(f"所选年份范围内的数据行数: {len(filtered_rows)}")
         
         if company_names:
-            company_name_list = [name.strip() for name in company_names.split(',') if name.strip()]
             st.write(f"输入的企业名称: {company_name_list}")
-            st.write(f"匹配到的企业名称: {list(filtered_df['企业名称'].unique())}")
+            st.write(f"匹配到的企业名称: {list(df['企业名称'].array.take(filtered_rows).unique())}")
             
             # 检查企业名称在所有年份的数据情况
-            filter_condition = pd.Series([False]*len(df), index=df.index)
-            for name in company_name_list:
-                filter_condition |= df['企业名称'].str.contains(name, na=False)
-            all_years_data = df[filter_condition]
-            if len(all_years_data) > 0:
-                available_years = sorted(all_years_data['年份'].unique())
+            available_years = panel_query.years_of(name_terms=company_name_list, ignore_case=False)
+            if available_years:
                 st.write(f"企业名称在数据库中的可用年份: {available_years}")
-                st.write(f"所选年份范围内的数据行数: {len(filtered_df)}")
+                st.write(f"所选年份范围内的数据行数: {len(filtered_rows)}")
         
         # 显示部分数据示例
-        if len(filtered_df) > 0:
+        if len(filtered_rows) > 0:
             st.subheader("数据示例")
-            st.dataframe(filtered_df[['股票代码', '企业名称', '年份', '行业名称', '数字化转型指数(0-100分)']].head(10))
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("📈 总记录数", f"{len(filtered_df):,}")
-    
-    with col2:
-        avg_index = round(filtered_df['数字化转型指数(0-100分)'].mean(), 2)
-        st.metric("📊 平均指数", avg_index)
+            st.dataframe(df.iloc[filtered_rows[:10]][['股票代码', '企业名称', '年份', '行业名称', '数字化转型指数(0-100分)']])
     
-    with col3:
-        max_index = filtered_df['数字化转型指数(0-100分)'].max()
-        st.metric("🏆 最高指数", max_index)
-    
-    with col4:
-        unique_companies = filtered_df['企业名称'].nunique()
-        st.metric("🏢 企业数量", unique_companies)
+    with run_profiler.section('顶部指标', cached=True):
+        filter_summary = panel_query.summary(**filter_params)
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("📈 总记录数", f"{filter_summary['total_rows']:,}")
+        
+        with col2:
+            avg_index = filter_summary['avg_index']
+            st.metric("📊 平均指数", avg_index)
+        
+        with col3:
+            max_index = filter_summary['max_index']
+            st.metric("🏆 最高指数", max_index)
+        
+        with col4:
+            unique_companies = filter_summary['companies']
+            st.metric("🏢 企业数量", unique_companies)
     
     # 数据概览
     st.markdown("<h2 class='pink-title'>📋 数据概览</h2>", unsafe_allow_html=True)
-    # 显示表格数据
-    if len(filtered_df) > 0:
-        st.dataframe(filtered_df, use_container_width=True)
+    # 显示表格数据：只取当前页的行，排序由预先计算的排序置换完成
+    if len(filtered_rows) > 0:
+        grid_col1, grid_col2, grid_col3, grid_col4 = st.columns(4)
+        with grid_col1:
+            sort_column = st.selectbox("排序字段", ['原始顺序'] + SORT_COLUMNS)
+        with grid_col2:
+            sort_order = st.radio("排序方式", ['降序', '升序'], horizontal=True, disabled=sort_column == '原始顺序')
+        with grid_col3:
+            page_size = st.selectbox("每页行数", PAGE_SIZE_OPTIONS, index=1)
+        total_pages = (len(filtered_rows) - 1) // page_size + 1
+        with grid_col4:
+            # 页数随筛选结果变化时控件重建，页码回到第 1 页
+            page = st.number_input("页码", min_value=1, max_value=total_pages, value=1, step=1)
+        page_df = panel_query.page(int(page), page_size,
+                                   column=None if sort_column == '原始顺序' else sort_column,
+                                   descending=sort_order == '降序', **filter_params)
+        st.caption(f"共 {len(filtered_rows):,} 条记录，第 {int(page)} / {total_pages} 页")
+        st.dataframe(page_df, width='stretch')
+        
+        # 导出当前筛选结果：点击下载时才按行号分块写出文件
+        export_formats = [fmt for fmt in EXPORT_FORMATS if fmt != 'Excel' or len(filtered_rows) < XLSX_MAX_ROWS]
+        export_col1, export_col2 = st.columns([1, 3])
+        with export_col1:
+            export_format = st.selectbox("导出格式", export_formats)
+        extension, mime = EXPORT_FORMATS[export_format]
+        with export_col2:
+            st.download_button(
+                label=f"💾 下载筛选结果（{len(filtered_rows):,} 条）",
+                data=partial(export_rows, df, filtered_rows, export_format),
+                file_name=f"数字化转型指数筛选结果.{extension}",
+                mime=mime
+            )
     else:
         st.info("没有找到符合条件的数据")
     
     # 2. 行业分布分析
     st.subheader("2. 行业分布分析")
-    if len(filtered_df) > 0:
-        industry_comparison = filtered_df.groupby('行业名称')['数字化转型指数(0-100分)'].mean().reset_index()
-        industry_comparison = industry_comparison.sort_values('数字化转型指数(0-100分)', ascending=False).head(20)
-        
-        fig, ax = plt.subplots(figsize=(12, 8))
-        sns.barplot(x='数字化转型指数(0-100分)', y='行业名称', data=industry_comparison, ax=ax)
-        ax.set_title('各行业平均数字化转型指数（前20名）', fontsize=16)
-        ax.set_xlabel('平均数字化转型指数', fontsize=12)
-        ax.set_ylabel('行业名称', fontsize=12)
-        st.pyplot(fig)
-        
-        # 添加图表导出功能
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=300, bbox_inches='tight')
-        buf.seek(0)
+    if len(filtered_rows) > 0:
+        with run_profiler.section('行业对比图', cached=True):
+            industry_comparison = panel_query.industry_ranking('数字化转型指数(0-100分)', top=20, **filter_params)
+        
+            chart = chart_cache.get('industry_bar', chart_signature, partial(draw_industry_bar, industry_comparison))
+            st.image(chart.screen_png, width='stretch')
+        
+        # 添加图表导出功能（点击下载时才生成300 dpi图片）
         st.download_button(
             label="💾 下载行业对比图",
-            data=buf,
+            data=chart.export_png,
             file_name="行业对比图.png",
             mime="image/png"
         )
@@ -465,24 +605,19 @@ if df is not None:
         # 3. 数字技术维度分析
         st.subheader("3. 数字技术维度分析")
         tech_dimensions = ['人工智能', '大数据', '云计算', '物联网', '区块链']
-        tech_avg = filtered_df[tech_dimensions].mean().reset_index()
-        tech_avg.columns = ['技术维度', '平均得分']
+        with run_profiler.section('技术维度条形图', cached=True):
+            tech_means = panel_query.measure_means(tech_dimensions, **filter_params)
+            tech_avg = tech_means.reset_index()
+            tech_avg.columns = ['技术维度', '平均得分']
     
-        # 条形图展示
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.barplot(x='技术维度', y='平均得分', data=tech_avg, ax=ax, palette='viridis')
-        ax.set_title('各数字技术维度平均得分', fontsize=16)
-        ax.set_xlabel('技术维度', fontsize=12)
-        ax.set_ylabel('平均得分', fontsize=12)
-        st.pyplot(fig)
-        
-        # 添加图表导出功能
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=300, bbox_inches='tight')
-        buf.seek(0)
+            # 条形图展示
+            chart = chart_cache.get('tech_bar', chart_signature, partial(draw_tech_bar, tech_avg))
+            st.image(chart.screen_png, width='stretch')
+        
+        # 添加图表导出功能（点击下载时才生成300 dpi图片）
         st.download_button(
             label="💾 下载技术维度条形图",
-            data=buf,
+            data=chart.export_png,
             file_name="技术维度条形图.png",
             mime="image/png"
         )
@@ -492,35 +627,16 @@ if df is not None:
         
         # 准备雷达图数据
         tech_dimensions = ['人工智能', '大数据', '云计算', '物联网', '区块链']
-        values = filtered_df[tech_dimensions].mean().values
+        with run_profiler.section('技术维度雷达图', cached=True):
+            values = tech_means.values
         
-        # 计算角度
-        angles = np.linspace(0, 2 * np.pi, len(tech_dimensions), endpoint=False).tolist()
-        # 闭合雷达图
-        values = np.concatenate((values, [values[0]]))
-        angles = np.concatenate((angles, [angles[0]]))
-        
-        # 创建雷达图
-        fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-        ax.plot(angles, values, linewidth=2, linestyle='solid', label='平均得分')
-        ax.fill(angles, values, alpha=0.25)
-        
-        # 设置标签
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(tech_dimensions)
-        ax.set_yticklabels([])
-        ax.set_title('技术维度雷达图', fontsize=16)
-        ax.legend(loc='upper right')
-        
-        st.pyplot(fig)
-        
-        # 添加图表导出功能
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=300, bbox_inches='tight')
-        buf.seek(0)
+            chart = chart_cache.get('tech_radar', chart_signature, partial(draw_tech_radar, tech_dimensions, values))
+            st.image(chart.screen_png, width='stretch')
+        
+        # 添加图表导出功能（点击下载时才生成300 dpi图片）
         st.download_button(
             label="💾 下载技术维度雷达图",
-            data=buf,
+            data=chart.export_png,
             file_name="技术维度雷达图.png",
             mime="image/png"
         )
@@ -530,60 +646,94 @@ if df is not None:
             st.markdown("<h3 class='pink-title'>3.2 不同年份技术维度对比</h3>", unsafe_allow_html=True)
             
             # 准备雷达图数据
-            fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-            
-            # 为每个年份绘制雷达图
-            for year in selected_years:
-                year_data = filtered_df[filtered_df['年份'] == year]
-                year_values = year_data[tech_dimensions].mean().values
-                # 闭合雷达图
-                year_values = np.concatenate((year_values, [year_values[0]]))
-                ax.plot(angles, year_values, linewidth=2, linestyle='solid', label=str(year))
-                ax.fill(angles, year_values, alpha=0.1)
-            
-            # 设置标签
-            ax.set_xticks(angles[:-1])
-            ax.set_xticklabels(tech_dimensions)
-            ax.set_yticklabels([])
-            ax.set_title('不同年份技术维度对比雷达图', fontsize=16)
-            ax.legend(loc='upper right')
+            with run_profiler.section('年份对比雷达图', cached=True):
+                year_values_list = panel_query.year_means(tech_dimensions, **filter_params)
             
-            st.pyplot(fig)
+                # 图例顺序跟随年份的选择顺序，签名中一并记录
+                year_radar_signature = (chart_signature, tuple(int(year) for year in selected_years))
+                chart = chart_cache.get('year_radar', year_radar_signature,
+                                        partial(draw_year_radar, tech_dimensions, year_values_list))
+                st.image(chart.screen_png, width='stretch')
             
-            # 添加图表导出功能
-            buf = io.BytesIO()
-            fig.savefig(buf, format="png", dpi=300, bbox_inches='tight')
-            buf.seek(0)
+            # 添加图表导出功能（点击下载时才生成300 dpi图片）
             st.download_button(
                 label="💾 下载年份对比雷达图",
-                data=buf,
+                data=chart.export_png,
                 file_name="年份对比雷达图.png",
                 mime="image/png"
             )
         
+        # 4. 企业趋势对比
+        st.markdown("<h3 class='pink-title'>4. 企业趋势对比</h3>", unsafe_allow_html=True)
+        
+        # 默认对比侧边栏输入的企业，没有输入时取筛选结果中指数最高的 5 家
+        default_codes = panel_query.series.find(stock_code_list) or \
+            panel_query.company_codes(5, '数字化转型指数(0-100分)', **filter_params)
+        trend_codes = st.multiselect(
+            "选择要对比的企业",
+            options=panel_query.series.codes.tolist(),
+            default=default_codes,
+            format_func=panel_query.series.label
+        )
+        trend_column = st.selectbox("对比指标", SERIES_COLUMNS)
+        
+        if trend_codes:
+            # 各企业 1999-2023 的完整轨迹从时间序列中按偏移切片，不受年份筛选影响
+            with run_profiler.section('企业趋势图', cached=True):
+                trend_df = panel_query.company_trends(trend_codes, trend_column)
+                
+                chart = chart_cache.get('company_trend', (tuple(trend_codes), trend_column),
+                                        partial(draw_company_trend, trend_df, trend_column))
+                st.image(chart.screen_png, width='stretch')
+            
+            # 添加图表导出功能（点击下载时才生成300 dpi图片）
+            st.download_button(
+                label="💾 下载企业趋势图",
+                data=chart.export_png,
+                file_name="企业趋势图.png",
+                mime="image/png"
+            )
+            st.dataframe(trend_df, width='stretch')
+        
         # 5. 企业排名
         st.markdown("<h3 class='pink-title'>5. 企业排名</h3>", unsafe_allow_html=True)
-        if len(filtered_df) > 0:
-            top_10 = filtered_df.nlargest(10, '数字化转型指数(0-100分)')[['企业名称', '年份', '行业名称', '数字化转型指数(0-100分)']]
-            st.dataframe(top_10, use_container_width=True)
+        if len(filtered_rows) > 0:
+            # 附加企业在当年所属行业内、当年全部企业中的名次和百分位
+            top_10 = panel_query.top_companies(10, '数字化转型指数(0-100分)', with_ranks=True, **filter_params)
+            st.dataframe(top_10, width='stretch')
+        
+        # 5.1 行业排行榜：名次和排名变化在加载时已算好，这里只按 (年份, 行业) 取出对应的片段
+        st.markdown("<h3 class='pink-title'>5.1 行业排行榜</h3>", unsafe_allow_html=True)
+        board_col1, board_col2, board_col3 = st.columns([1, 3, 1])
+        with board_col1:
+            board_year = st.selectbox("排行年份", sorted(selected_years or panel_query.ranks.years, reverse=True))
+        with board_col2:
+            board_industry = st.selectbox("排行行业", ['全部行业'] + (selected_industries or panel_query.ranks.industries))
+        with board_col3:
+            board_size = st.selectbox("显示企业数", [10, 20, 50])
+        with run_profiler.section('行业排行榜'):
+            boards = panel_query.leaderboard(int(board_year), None if board_industry == '全部行业' else board_industry, board_size)
+        top_tab, bottom_tab, riser_tab, faller_tab = st.tabs(["前列企业", "末位企业", "名次上升最多", "名次下降最多"])
+        for tab, name in zip((top_tab, bottom_tab, riser_tab, faller_tab), ('top', 'bottom', 'risers', 'fallers')):
+            with tab:
+                if len(boards[name]) > 0:
+                    st.dataframe(boards[name], width='stretch')
+                else:
+                    st.info("没有可比较的上一年名次" if name in ('risers', 'fallers') else "该年份、行业没有数据")
         
         # 6. 相关性分析
         st.subheader("6. 相关性分析")
         corr_columns = ['数字化转型指数(0-100分)', '人工智能', '大数据', '云计算', '物联网', '区块链', '总词频数']
-        corr_matrix = filtered_df[corr_columns].corr()
+        with run_profiler.section('相关性热力图', cached=True):
+            corr_matrix = panel_query.correlation(corr_columns, **filter_params)
         
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', linewidths=0.5, ax=ax)
-        ax.set_title('各维度相关性热力图', fontsize=16)
-        st.pyplot(fig)
+            chart = chart_cache.get('corr_heatmap', chart_signature, partial(draw_corr_heatmap, corr_matrix))
+            st.image(chart.screen_png, width='stretch')
         
-        # 添加图表导出功能
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=300, bbox_inches='tight')
-        buf.seek(0)
+        # 添加图表导出功能（点击下载时才生成300 dpi图片）
         st.download_button(
             label="💾 下载相关性热力图",
-            data=buf,
+            data=chart.export_png,
             file_name="相关性热力图.png",
             mime="image/png"
         )
@@ -591,238 +741,45 @@ if df is not None:
         # 7. 地理分布分析
         st.header("🌍 地理分布分析")
         
-        # 中国所有省份列表
-        all_provinces = ['北京', '上海', '广东', '江苏', '浙江', '山东', '福建', '河南', '湖北', '湖南', 
-                         '四川', '河北', '安徽', '江西', '辽宁', '陕西', '山西', '黑龙江', '吉林', '云南', 
-                         '贵州', '广西', '天津', '重庆', '内蒙古', '新疆', '甘肃', '宁夏', '青海', '西藏', '海南']
-        
-        # 计算各省份的平均数字化转型指数
-        province_data = filtered_df.groupby('省份')['数字化转型指数(0-100分)'].agg(['mean', 'count']).reset_index()
-        province_data.columns = ['省份', '平均数字化转型指数', '企业数量']
-        
-        # 将'全国'类别的数据排除（如果存在）
-        if not province_data.empty and '全国' in province_data['省份'].values:
-            province_data = province_data[province_data['省份'] != '全国']
-        
-        # 创建所有省份的数据框，确保每个省份都有数据
-        all_province_data = pd.DataFrame({'省份': all_provinces})
-        province_data = pd.merge(all_province_data, province_data, on='省份', how='left')
-        
-        # 填充缺失值
-        province_data['平均数字化转型指数'] = province_data['平均数字化转型指数'].fillna(0)
-        province_data['企业数量'] = province_data['企业数量'].fillna(0)
-        
-        # 转换企业数量为整数类型
-        province_data['企业数量'] = province_data['企业数量'].astype(int)
+        # 计算各省份的平均数字化转型指数（没有企业的省份记为 0）
+        with run_profiler.section('省份汇总', cached=True):
+            province_data = panel_query.province_averages('数字化转型指数(0-100分)', **filter_params)
         
         # 添加中国地图可视化
         st.subheader("7. 地理分布地图")
+        map_zoom = st.slider("地图缩放级别", *MAP_ZOOM_RANGE, MAP_ZOOM,
+                             help="缩放级别越大，地图初始范围越小，省份边界越精细（4 及以下为粗略，5-6 为中等，7 以上为精细）")
         
         # 创建中国地图
         try:
-            import folium
-            from streamlit_folium import folium_static
-            import ssl
-            import urllib.request
+            with run_profiler.section('省份边界数据', cached=True):
+                geo_store = load_province_geojson()
+            if geo_store is None:
+                st.write(f"未找到本地省份边界数据：{GEOJSON_PATH}")
+                st.write("请在部署时于有网络的环境中运行 `python geo_data.py --download` 生成该文件并随应用部署（部署后重启应用生效），当前将只显示标记点，不显示省份边界")
             
-            # 创建地图对象，中心设为中国
-            m = folium.Map(location=[35.8617, 104.1954], zoom_start=4, tiles='CartoDB positron')
-            
-            # 添加中国省份边界GeoJSON
-            # 注意：这里使用了公开的中国省份GeoJSON数据URL
-            geojson_url = 'https://geo.datav.aliyun.com/areas_v3/bound/100000_full.json'
-            
-            # 备选GeoJSON数据源
-            backup_geojson_url = 'https://raw.githubusercontent.com/echarts-maps/echarts-china-counties-js/master/echarts-china-provinces-js/china.js'
-            
-            # 禁用SSL验证（解决自签名证书问题）
-            context = ssl.create_default_context()
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            # 将省份数据转换为字典，便于地图着色
-            province_index_dict = province_data.set_index('省份')['平均数字化转型指数'].to_dict()
-            province_company_dict = province_data.set_index('省份')['企业数量'].to_dict()
-            
-            try:
-                # 使用urllib下载GeoJSON数据并禁用SSL验证
-                with urllib.request.urlopen(geojson_url, context=context) as response:
-                    geojson_data = response.read().decode('utf-8')
-                    
-                # 添加GeoJSON层
-                folium.Choropleth(
-                    geo_data=geojson_data,
-                    name='choropleth',
-                    data=province_data,
-                    columns=['省份', '平均数字化转型指数'],
-                    key_on='feature.properties.name',
-                    fill_color='YlOrRd',
-                    fill_opacity=0.7,
-                    line_opacity=0.2,
-                    legend_name='平均数字化转型指数(0-100分)',
-                    highlight=True,
-                    smooth_factor=0
-                ).add_to(m)
-                
-                # 添加省份边界
-                folium.GeoJson(
-                    geojson_data,
-                    name='省份边界',
-                    style_function=lambda feature: {
-                        'fillColor': '#ffffff',
-                        'color': '#000000',
-                        'weight': 0.5,
-                        'fillOpacity': 0
-                    },
-                    tooltip=folium.GeoJsonTooltip(
-                        fields=['name'],
-                        aliases=['省份:'],
-                        style=('background-color: white; color: #333333; font-family: arial; font-size: 12px; padding: 10px;')
-                    )
-                ).add_to(m)
-            except Exception as e:
-                st.write(f"使用主数据源失败：{e}")
-                st.write("尝试使用备用数据源...")
-                
-                # 尝试使用备用数据源
-                try:
-                    with urllib.request.urlopen(backup_geojson_url, context=context) as response:
-                        geojson_data = response.read().decode('utf-8')
-                        
-                    # 处理备用数据源的格式差异
-                    # 注意：备用数据源可能需要不同的key_on参数
-                    folium.Choropleth(
-                        geo_data=geojson_data,
-                        name='choropleth',
-                        data=province_data,
-                        columns=['省份', '平均数字化转型指数'],
-                        key_on='feature.properties.name',
-                        fill_color='YlOrRd',
-                        fill_opacity=0.7,
-                        line_opacity=0.2,
-                        legend_name='平均数字化转型指数(0-100分)',
-                        highlight=True,
-                        smooth_factor=0
-                    ).add_to(m)
-                    
-                    folium.GeoJson(
-                        geojson_data,
-                        name='省份边界',
-                        style_function=lambda feature: {
-                            'fillColor': '#ffffff',
-                            'color': '#000000',
-                            'weight': 0.5,
-                            'fillOpacity': 0
-                        },
-                        tooltip=folium.GeoJsonTooltip(
-                            fields=['name'],
-                            aliases=['省份:'],
-                            style=('background-color: white; color: #333333; font-family: arial; font-size: 12px; padding: 10px;')
-                        )
-                    ).add_to(m)
-                except Exception as e2:
-                    st.write(f"使用备用数据源也失败：{e2}")
-                    st.write("将只显示标记点，不显示省份边界")
-            
-            # 添加交互式标记
-            for _, row in province_data.iterrows():
-                # 获取省份的中心坐标（简化处理，实际应用中可以使用更准确的坐标数据）
-                # 这里使用一个简单的省份中心坐标映射，实际应用中可以替换为更准确的数据
-                province_coords = {
-                    '北京': [39.9042, 116.4074],
-                    '上海': [31.2304, 121.4737],
-                    '广东': [23.1291, 113.2644],
-                    '江苏': [32.0603, 118.7969],
-                    '浙江': [30.2741, 120.1551],
-                    '山东': [36.6512, 117.1201],
-                    '福建': [26.0745, 119.2965],
-                    '河南': [34.7466, 113.6254],
-                    '湖北': [30.5928, 114.3055],
-                    '湖南': [28.2278, 112.9388],
-                    '四川': [30.5728, 104.0668],
-                    '河北': [38.0428, 114.5149],
-                    '安徽': [31.8206, 117.2272],
-                    '江西': [28.6826, 115.8581],
-                    '辽宁': [41.8056, 123.4315],
-                    '陕西': [34.3416, 108.9398],
-                    '山西': [37.8706, 112.5489],
-                    '黑龙江': [45.8038, 126.5349],
-                    '吉林': [43.8170, 125.3245],
-                    '云南': [25.0453, 102.7126],
-                    '贵州': [26.5783, 106.7078],
-                    '广西': [22.8170, 108.3668],
-                    '天津': [39.3434, 117.3616],
-                    '重庆': [29.4316, 106.9123],
-                    '内蒙古': [40.8183, 111.6708],
-                    '新疆': [43.7928, 87.6271],
-                    '甘肃': [36.0611, 103.8343],
-                    '宁夏': [38.4680, 106.2319],
-                    '青海': [36.6172, 101.7782],
-                    '西藏': [29.6469, 91.1175],
-                    '海南': [20.0440, 110.3496],
-                    '香港': [22.3193, 114.1694],
-                    '澳门': [22.1987, 113.5493],
-                    '台湾': [23.6978, 120.9605],
-                    '全国': [35.8617, 104.1954]  # 默认位置
-                }
-                
-                # 获取省份坐标，如果没有则使用默认坐标
-                coords = province_coords.get(row['省份'], [35.8617, 104.1954])
+            with run_profiler.section('地图生成', cached=True):
+                map_html = render_province_map(province_data, map_zoom, geo_store.sha256 if geo_store is not None else None)
                 
-                # 添加标记
-                folium.Marker(
-                    location=coords,
-                    tooltip=f"{row['省份']}<br>平均指数: {row['平均数字化转型指数']:.1f}<br>企业数量: {row['企业数量']}",
-                    popup=folium.Popup(
-                        f"<strong>{row['省份']}</strong><br>" +
-                        f"平均数字化转型指数: {row['平均数字化转型指数']:.1f}<br>" +
-                        f"企业数量: {row['企业数量']}",
-                        max_width=300
-                    ),
-                    icon=folium.Icon(color='blue' if row['平均数字化转型指数'] < 50 else 'red', prefix='fa', icon='building')
-                ).add_to(m)
-            
-            # 添加图层控制器
-            folium.LayerControl().add_to(m)
-            
-            # 在Streamlit中显示地图
-            folium_static(m, width=1000, height=600)
+                # 在Streamlit中显示地图
+                components.html(map_html, width=MAP_WIDTH, height=MAP_HEIGHT + 10)
             
         except Exception as e:
             st.write(f"地图生成错误：{e}")
-            st.write("如果地图无法显示，可能是由于网络连接问题或GeoJSON数据访问限制。")
+            st.write("如果地图无法显示，请检查本地省份边界数据是否完整。")
         
         # 使用matplotlib绘制条形图
-        fig, ax = plt.subplots(figsize=(12, 8))
-        
-        # 按平均数字化转型指数降序排序
-        sorted_province_data = province_data.sort_values('平均数字化转型指数', ascending=True)
-        
-        # 绘制条形图
-        bars = ax.barh(sorted_province_data['省份'], sorted_province_data['平均数字化转型指数'], 
-                       color=plt.cm.RdBu_r(sorted_province_data['平均数字化转型指数']/100))
-        
-        # 添加数值标签
-        for bar in bars:
-            width = bar.get_width()
-            ax.text(width + 1, bar.get_y() + bar.get_height()/2, 
-                    f'{width:.1f}', ha='left', va='center', fontsize=10)
-        
-        # 设置图表属性
-        ax.set_title('各省份平均数字化转型指数分布', fontsize=16)
-        ax.set_xlabel('平均数字化转型指数(0-100分)', fontsize=12)
-        ax.set_xlim(0, 100)
-        ax.grid(True, alpha=0.3, axis='x')
-        
-        # 调整布局
-        plt.tight_layout()
-        
-        # 显示图表
-        st.pyplot(fig)
+        with run_profiler.section('省份条形图', cached=True):
+            chart = chart_cache.get('province_bar', chart_signature, partial(draw_province_bar, province_data))
+            
+            # 显示图表
+            st.image(chart.screen_png, width='stretch')
         
         # 可选：显示Plotly版本的图表（如果用户需要）
         if st.checkbox("显示Plotly版本图表（可选）"):
             try:
+                # plotly 只在勾选后才导入
+                import plotly.express as px
                 fig = px.bar(
                     province_data.sort_values('平均数字化转型指数', ascending=False),
                     x="省份",
@@ -852,6 +809,23 @@ if df is not None:
     else:
         st.warning("无法加载数据，请检查文件路径是否正确")
 
+    # 分段计时：本次运行写入滚动历史，调试模式下显示本次明细和历史统计
+    run_profiler.finish()
+    run_history = load_run_history()
+    run_history.append(run_profiler)
+    if show_debug:
+        st.subheader("⏱️ 分段计时")
+        st.checkbox("记录内存分配峰值（tracemalloc，对整个进程生效，会降低运行速度）",
+                    value=memory_tracing_enabled(), key='trace_memory',
+                    on_change=lambda: set_memory_tracing(st.session_state.trace_memory))
+        st.caption(f"本次运行总耗时 {run_profiler.total_seconds * 1000:.1f} 毫秒；"
+                   f"省份提取在数据加载时完成，其耗时已包含在数据加载中")
+        st.dataframe(run_profiler.table(), width='stretch')
+        st.markdown(f"**最近 {len(run_history.runs())} 次运行**（进程内所有会话，最多保留 {run_history.maxlen} 次）")
+        st.dataframe(run_history.runs_table(), width='stretch')
+        st.markdown("**各分段统计**")
+        st.dataframe(run_history.summary_table(), width='stretch')
+
     # 页脚
     st.markdown(
         "<div style='text-align: center; margin-top: 50px; padding: 10px; color: #888;'>© 2024 数字化转型指数分析平台</div>",
@@ -0,0 +1,368 @@
+import os
+import sys
+import json
+import hashlib
+from collections import defaultdict
+import numpy as np
+
+# 省份边界数据模块
+# 地图只读取本地的省份 GeoJSON（china_provinces.geojson），页面运行过程中不访问网络。
+# 本地文件可随项目一起部署，也可以在部署时于有网络的机器上运行一次 `python geo_data.py --download` 获取。
+# 加载时按几档容差做保持拓扑的简化（相邻省份的公共边界简化结果一致，不产生缝隙），
+# 简化结果缓存到本地文件，每个进程只解析一次，由地图按页面上选择的缩放级别选择合适的精度。
+# 地图（边界着色 + 省份标记）由省份汇总数据一次性组装，输出为可直接缓存的 HTML。
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOJSON_PATH = os.path.join(BASE_DIR, 'china_provinces.geojson')
+SOURCE_URL = 'https://geo.datav.aliyun.com/areas_v3/bound/100000_full.json'
+
+# 地图默认中心（中国）
+DEFAULT_MAP_CENTER = [35.8617, 104.1954]
+
+# 省份中心坐标（纬度, 经度），用于放置省份标记
+PROVINCE_COORDS = {
+    '北京': [39.9042, 116.4074],
+    '上海': [31.2304, 121.4737],
+    '广东': [23.1291, 113.2644],
+    '江苏': [32.0603, 118.7969],
+    '浙江': [30.2741, 120.1551],
+    '山东': [36.6512, 117.1201],
+    '福建': [26.0745, 119.2965],
+    '河南': [34.7466, 113.6254],
+    '湖北': [30.5928, 114.3055],
+    '湖南': [28.2278, 112.9388],
+    '四川': [30.5728, 104.0668],
+    '河北': [38.0428, 114.5149],
+    '安徽': [31.8206, 117.2272],
+    '江西': [28.6826, 115.8581],
+    '辽宁': [41.8056, 123.4315],
+    '陕西': [34.3416, 108.9398],
+    '山西': [37.8706, 112.5489],
+    '黑龙江': [45.8038, 126.5349],
+    '吉林': [43.8170, 125.3245],
+    '云南': [25.0453, 102.7126],
+    '贵州': [26.5783, 106.7078],
+    '广西': [22.8170, 108.3668],
+    '天津': [39.3434, 117.3616],
+    '重庆': [29.4316, 106.9123],
+    '内蒙古': [40.8183, 111.6708],
+    '新疆': [43.7928, 87.6271],
+    '甘肃': [36.0611, 103.8343],
+    '宁夏': [38.4680, 106.2319],
+    '青海': [36.6172, 101.7782],
+    '西藏': [29.6469, 91.1175],
+    '海南': [20.0440, 110.3496],
+    '香港': [22.3193, 114.1694],
+    '澳门': [22.1987, 113.5493],
+    '台湾': [23.6978, 120.9605],
+    '全国': DEFAULT_MAP_CENTER  # 默认位置
+}
+
+# 简化容差（单位：经纬度），从精细到粗略
+TOLERANCES = {'fine': 0.005, 'medium': 0.02, 'coarse': 0.08}
+SIMPLIFY_VERSION = 1
+
+# 省份全称中需要去掉的后缀，使边界数据的名称与 省份 列（如 '广西'、'内蒙古'）一致
+_NAME_SUFFIXES = ['壮族自治区', '回族自治区', '维吾尔自治区', '特别行政区', '自治区', '省', '市']
+
+
+def short_province_name(name):
+    for suffix in _NAME_SUFFIXES:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def tolerance_for_zoom(zoom):
+    # 缩放级别越小，显示范围越大，可使用越粗略的边界
+    if zoom >= 7:
+        return 'fine'
+    if zoom >= 5:
+        return 'medium'
+    return 'coarse'
+
+
+def download_geojson(path=GEOJSON_PATH, url=SOURCE_URL):
+    # 一次性下载边界数据到本地（校验证书），供离线部署使用；页面运行时不会调用，也不导入 urllib
+    import urllib.request
+    with urllib.request.urlopen(url, timeout=60) as response:
+        data = json.loads(response.read().decode('utf-8'))
+    if data.get('type') != 'FeatureCollection':
+        raise ValueError(f'{url} 返回的不是 GeoJSON FeatureCollection')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _douglas_peucker(points, tolerance):
+    # 返回保留点的下标（含首尾两点）
+    n = len(points)
+    if n < 3:
+        return list(range(n))
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        inner = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distances = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return np.flatnonzero(keep).tolist()
+
+
+def _iter_rings(geometry):
+    # 产出 (多边形序号, 环序号, 坐标列表)；环序号 0 为外环
+    if geometry is None:
+        return
+    if geometry['type'] == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        return
+    for p, polygon in enumerate(polygons):
+        for r, ring in enumerate(polygon):
+            yield p, r, ring
+
+
+def simplify_geojson(geojson, tolerance):
+    # 保持拓扑的简化：先按"被哪些环共用"把每个环切成弧段，相同的弧段只简化一次，
+    # 这样相邻省份的公共边界在两侧得到完全相同的结果
+    rings = []
+    for f, feature in enumerate(geojson['features']):
+        for p, r, ring in _iter_rings(feature.get('geometry')):
+            points = [tuple(pt[:2]) for pt in ring]
+            if len(points) > 1 and points[0] == points[-1]:
+                points = points[:-1]
+            rings.append(((f, p, r), points))
+
+    owners = defaultdict(set)
+    for ring_id, (_, points) in enumerate(rings):
+        for pt in points:
+            owners[pt].add(ring_id)
+
+    arc_cache = {}
+
+    def simplify_arc(arc):
+        # 弧段按规范方向简化，正反两个方向遍历同一弧段时结果一致
+        forward = arc[0] < arc[-1] or (arc[0] == arc[-1] and arc[1:2] <= arc[-2:-1])
+        key = tuple(arc) if forward else tuple(reversed(arc))
+        if key not in arc_cache:
+            kept = _douglas_peucker(np.array(key, dtype=np.float64), tolerance)
+            arc_cache[key] = [key[i] for i in kept]
+        result = arc_cache[key]
+        return result if forward else result[::-1]
+
+    simplified = {}
+    for location, points in rings:
+        n = len(points)
+        if n < 4:
+            simplified[location] = points + points[:1]
+            continue
+        fixed = [i for i in range(n)
+                 if owners[points[i]] != owners[points[i - 1]] or owners[points[i]] != owners[points[(i + 1) % n]]]
+        if len(fixed) < 2:
+            # 不与其他环共用的独立环：固定起点和离起点最远的点
+            coords = np.array(points, dtype=np.float64)
+            far = int(np.argmax(np.hypot(*(coords - coords[0]).T)))
+            fixed = sorted({0, far}) if far else [0, n // 2]
+        new_ring = []
+        for k, start in enumerate(fixed):
+            end = fixed[(k + 1) % len(fixed)]
+            arc = points[start:end + 1] if end > start else points[start:] + points[:end + 1]
+            new_ring.extend(simplify_arc(arc)[:-1])
+        simplified[location] = new_ring + new_ring[:1]
+
+    features = []
+    for f, feature in enumerate(geojson['features']):
+        geometry = feature.get('geometry')
+        if geometry is None or geometry['type'] not in ('Polygon', 'MultiPolygon'):
+            features.append(feature)
+            continue
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        new_polygons = []
+        for p, polygon in enumerate(polygons):
+            new_polygon = []
+            for r in range(len(polygon)):
+                ring = simplified[(f, p, r)]
+                if len(ring) >= 4:
+                    new_polygon.append([list(pt) for pt in ring])
+                elif r == 0:
+                    # 外环简化后退化（小岛），保留原始坐标
+                    new_polygon.append(polygon[0])
+            if new_polygon:
+                new_polygons.append(new_polygon)
+        new_geometry = {'type': geometry['type'],
+                        'coordinates': new_polygons[0] if geometry['type'] == 'Polygon' else new_polygons}
+        features.append({**feature, 'geometry': new_geometry})
+    return {**geojson, 'features': features}
+
+
+def _normalize_names(geojson):
+    # properties.name 改为省份简称，原全称保存在 full_name
+    for feature in geojson['features']:
+        properties = feature.setdefault('properties', {})
+        full_name = properties.get('name') or ''
+        properties['full_name'] = full_name
+        properties['name'] = short_province_name(full_name)
+    return geojson
+
+
+class GeoStore:
+    # 进程内只读的省份边界数据：各档容差的简化结果
+
+    def __init__(self, path=GEOJSON_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            raw = f.read()
+        self.sha256 = hashlib.sha256(raw).hexdigest()
+        self.variants = self._load_cached_variants()
+        if self.variants is None:
+            source = _normalize_names(json.loads(raw.decode('utf-8')))
+            self.variants = {level: simplify_geojson(source, tol) for level, tol in TOLERANCES.items()}
+            self._write_cached_variants()
+
+    def _cache_path(self):
+        base, _ = os.path.splitext(self.path)
+        return base + '.simplified.json'
+
+    def _cache_key(self):
+        return {'version': SIMPLIFY_VERSION, 'sha256': self.sha256, 'tolerances': TOLERANCES}
+
+    def _load_cached_variants(self):
+        try:
+            with open(self._cache_path(), 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('key') == self._cache_key():
+                return cached['variants']
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def _write_cached_variants(self):
+        # 写缓存失败（如目录只读）不影响使用
+        tmp_path = f'{self._cache_path()}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': self._cache_key(), 'variants': self.variants}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._cache_path())
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def for_zoom(self, zoom):
+        return self.variants[tolerance_for_zoom(zoom)]
+
+
+def province_marker_features(province_data):
+    # 由省份汇总数据（省份、平均数字化转型指数、企业数量）整列生成标记点 GeoJSON
+    coords = [PROVINCE_COORDS.get(name, DEFAULT_MAP_CENTER) for name in province_data['省份']]
+    averages = province_data['平均数字化转型指数'].to_numpy(dtype=np.float64)
+    colors = np.where(averages < 50, 'blue', 'red')
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': {'省份': name, '平均指数': f'{avg:.1f}', '企业数量': int(count), 'color': color},
+        }
+        for name, (lat, lon), avg, count, color in zip(
+            province_data['省份'], coords, averages, province_data['企业数量'], colors)
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def build_province_map_html(province_data, geo_store, zoom, height=600):
+    # 组装地图并输出完整 HTML；geo_store 为 None 时只显示省份标记
+    import folium
+
+    m = folium.Map(location=DEFAULT_MAP_CENTER, zoom_start=zoom, tiles='CartoDB positron')
+
+    if geo_store is not None:
+        geojson_data = geo_store.for_zoom(zoom)
+
+        # 添加GeoJSON层
+        folium.Choropleth(
+            geo_data=geojson_data,
+            name='choropleth',
+            data=province_data,
+            columns=['省份', '平均数字化转型指数'],
+            key_on='feature.properties.name',
+            fill_color='YlOrRd',
+            fill_opacity=0.7,
+            line_opacity=0.2,
+            legend_name='平均数字化转型指数(0-100分)',
+            highlight=True,
+            smooth_factor=0
+        ).add_to(m)
+
+        # 添加省份边界
+        folium.GeoJson(
+            geojson_data,
+            name='省份边界',
+            style_function=lambda feature: {
+                'fillColor': '#ffffff',
+                'color': '#000000',
+                'weight': 0.5,
+                'fillOpacity': 0
+            },
+            tooltip=folium.GeoJsonTooltip(
+                fields=['name'],
+                aliases=['省份:'],
+                style=('background-color: white; color: #333333; font-family: arial; font-size: 12px; padding: 10px;')
+            )
+        ).add_to(m)
+
+    # 全部省份标记作为一个图层输出
+    markers = folium.FeatureGroup(name='省份标记')
+    folium.GeoJson(
+        province_marker_features(province_data),
+        marker=folium.CircleMarker(radius=8, fill=True, weight=1),
+        style_function=lambda feature: {
+            'color': feature['properties']['color'],
+            'fillColor': feature['properties']['color'],
+            'fillOpacity': 0.7
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['省份', '平均指数', '企业数量'],
+                                      aliases=['省份:', '平均指数:', '企业数量:']),
+        popup=folium.GeoJsonPopup(fields=['省份', '平均指数', '企业数量'],
+                                  aliases=['省份', '平均数字化转型指数', '企业数量'],
+                                  max_width=300)
+    ).add_to(markers)
+    markers.add_to(m)
+
+    # 添加图层控制器
+    folium.LayerControl().add_to(m)
+
+    figure = folium.Figure(height=height).add_child(m)
+    return figure.render()
+
+
+def load_geo_store(path=GEOJSON_PATH):
+    # 只读取本地文件；没有边界数据时返回 None，由地图退化为只显示标记点
+    if not os.path.exists(path):
+        return None
+    return GeoStore(path)
+
+
+if __name__ == '__main__':
+    if '--download' in sys.argv[1:]:
+        print(f'正在下载省份边界数据：{SOURCE_URL}')
+        saved = download_geojson()
+        store = GeoStore(saved)
+        print(f'已保存到：{saved}，并生成简化版本：{", ".join(store.variants)}')
+    else:
+        print('用法：python geo_data.py --download')
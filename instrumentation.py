@@ -0,0 +1,189 @@
+import time
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# 页面运行分段计时模块
+# 每次重新运行时，按命名的分段（数据加载、省份提取、数据筛选、顶部指标、各图表、省份边界数据、地图生成）
+# 记录耗时、内存分配峰值和缓存命中情况；完成的运行写入进程内共享的滚动历史，供调试面板查看哪个分段拖慢了页面。
+# 内存峰值依赖 tracemalloc（会明显降低运行速度），默认不开启；tracemalloc 按进程统计，
+# 多个会话同时运行时峰值会互相叠加，只作为定位参考。
+
+# 缓存状态：命中、未命中、不经过缓存
+CACHE_HIT = '命中'
+CACHE_MISS = '未命中'
+CACHE_NONE = '—'
+
+# 每个会话的运行在各自的线程中执行，当前运行记录在线程局部变量中，
+# 缓存函数体内调用 record_miss() 即可标记所在分段未命中缓存
+_local = threading.local()
+
+
+class SectionTiming:
+
+    def __init__(self, name, cached):
+        self.name = name
+        self.seconds = 0.0
+        self.peak_bytes = None
+        self.cache = CACHE_HIT if cached else CACHE_NONE
+
+
+class RunProfiler:
+    # 单次运行的分段记录；分段可以嵌套，外层分段的耗时和峰值包含内层
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.sections = []
+        self._stack = []
+        self._start = time.perf_counter()
+        self.total_seconds = None
+
+    @contextmanager
+    def section(self, name, cached=False):
+        timing = SectionTiming(name, cached)
+        self.sections.append(timing)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # 重置峰值前先把外层分段到目前为止的峰值保存下来
+                outer = self._stack[-1]
+                outer[2] = max(outer[2], peak)
+            tracemalloc.reset_peak()
+            frame = [timing, current, current]
+        else:
+            frame = [timing, None, None]
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.seconds = time.perf_counter() - start
+            self._stack.pop()
+            if tracing and tracemalloc.is_tracing():
+                peak = max(frame[2], tracemalloc.get_traced_memory()[1])
+                timing.peak_bytes = max(peak - frame[1], 0)
+                if self._stack:
+                    outer = self._stack[-1]
+                    outer[2] = max(outer[2], peak)
+
+    def record(self, name, seconds, cache=CACHE_NONE, peak_bytes=None):
+        # 记录在别处计时的阶段（如数据加载内部的省份提取）
+        timing = SectionTiming(name, False)
+        timing.seconds = seconds
+        timing.cache = cache
+        timing.peak_bytes = peak_bytes
+        self.sections.append(timing)
+
+    def mark_miss(self):
+        if self._stack:
+            self._stack[-1][0].cache = CACHE_MISS
+
+    def finish(self):
+        self.total_seconds = time.perf_counter() - self._start
+        if getattr(_local, 'run', None) is self:
+            _local.run = None
+
+    def table(self):
+        # 本次运行的分段明细
+        return pd.DataFrame({
+            '分段': [s.name for s in self.sections],
+            '耗时(毫秒)': [s.seconds * 1000 for s in self.sections],
+            '内存峰值(KB)': [s.peak_bytes / 1024 if s.peak_bytes is not None else None for s in self.sections],
+            '缓存': [s.cache for s in self.sections],
+        })
+
+
+def start_run(session_id=None):
+    run = RunProfiler(session_id)
+    _local.run = run
+    return run
+
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+
+def record_miss():
+    # 在缓存函数体和缓存的未命中分支中调用；不在页面运行中（如命令行、下载回调）时不做任何事
+    run = current_run()
+    if run is not None:
+        run.mark_miss()
+
+
+def memory_tracing_enabled():
+    return tracemalloc.is_tracing()
+
+
+def set_memory_tracing(enabled):
+    # 按进程开启或关闭 tracemalloc
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+class RunHistory:
+    # 最近若干次完成的运行，进程内所有会话共享
+
+    def __init__(self, maxlen=200):
+        self.maxlen = maxlen
+        self._runs = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def append(self, run):
+        with self._lock:
+            self._runs.append(run)
+
+    def runs(self):
+        with self._lock:
+            return list(self._runs)
+
+    def runs_table(self):
+        # 每次运行一行：时间、会话、总耗时、最慢的分段及各分段耗时（毫秒）
+        records = []
+        for run in reversed(self.runs()):
+            record = {
+                '时间': time.strftime('%H:%M:%S', time.localtime(run.started_at)),
+                '会话': (run.session_id or '')[:8],
+                '总耗时(毫秒)': (run.total_seconds or 0.0) * 1000,
+            }
+            if run.sections:
+                slowest = max(run.sections, key=lambda s: s.seconds)
+                record['最慢分段'] = slowest.name
+            misses = [s.name for s in run.sections if s.cache == CACHE_MISS]
+            record['未命中缓存'] = '、'.join(misses)
+            for s in run.sections:
+                column = f'{s.name}(毫秒)'
+                record[column] = record.get(column, 0.0) + s.seconds * 1000
+            records.append(record)
+        return pd.DataFrame(records)
+
+    def summary_table(self):
+        # 各分段在历史中的次数、平均/P95/最大耗时、最大内存峰值和缓存未命中率
+        by_name = {}
+        for run in self.runs():
+            for s in run.sections:
+                by_name.setdefault(s.name, []).append(s)
+        records = []
+        for name, sections in by_name.items():
+            seconds = np.array([s.seconds for s in sections]) * 1000
+            peaks = [s.peak_bytes for s in sections if s.peak_bytes is not None]
+            cached = [s for s in sections if s.cache != CACHE_NONE]
+            records.append({
+                '分段': name,
+                '次数': len(sections),
+                '平均(毫秒)': seconds.mean(),
+                'P95(毫秒)': np.percentile(seconds, 95),
+                '最大(毫秒)': seconds.max(),
+                '最大内存峰值(KB)': max(peaks) / 1024 if peaks else None,
+                '缓存未命中率': sum(s.cache == CACHE_MISS for s in cached) / len(cached) if cached else None,
+            })
+        table = pd.DataFrame(records)
+        if not table.empty:
+            table = table.sort_values('平均(毫秒)', ascending=False, ignore_index=True)
+        return table
@@ -0,0 +1,94 @@
+import re
+from collections import deque
+
+# 多模式关键词匹配模块
+# Aho-Corasick 自动机：一次扫描文本即可找出所有出现的关键词。
+# 企业名称的省份匹配（province_matcher.py）使用 first_match 取优先级最高的关键词，
+# 年报关键词计数（keyword_counter.py）使用 find_all 分段扫描全部匹配。
+
+
+class KeywordAutomaton:
+    # 多模式匹配自动机：patterns 的顺序即优先级，越靠前优先级越高
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        # 每个状态（含失败链上的后缀）所能匹配到的最高优先级模式，无匹配为 None
+        self.best = [None]
+        # 每个状态（含失败链上的后缀）匹配到的全部模式序号
+        self.outputs = [()]
+        for priority, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.best.append(None)
+                    self.outputs.append(())
+                state = nxt
+            if self.best[state] is None or priority < self.best[state]:
+                self.best[state] = priority
+            self.outputs[state] += (priority,)
+        self._build_failure_links()
+        # 根状态下只有这些字符能开始匹配，扫描时可直接跳到下一个这样的字符
+        self._root_search = re.compile('[' + ''.join(re.escape(ch) for ch in self.goto[0]) + ']').search
+
+    def _build_failure_links(self):
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                # 合并失败链上的匹配结果，扫描时无需再沿失败链回溯
+                inherited = self.best[self.fail[nxt]]
+                if inherited is not None and (self.best[nxt] is None or inherited < self.best[nxt]):
+                    self.best[nxt] = inherited
+                self.outputs[nxt] += self.outputs[self.fail[nxt]]
+
+    def _step(self, state, ch):
+        while state and ch not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(ch, 0)
+
+    def first_match(self, text):
+        # 返回文本中出现的优先级最高的模式序号，无匹配返回 None
+        best = None
+        state = 0
+        for ch in text:
+            state = self._step(state, ch)
+            found = self.best[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+    def find_all(self, text, state=0):
+        # 返回 ([(结束位置, 模式序号), ...], 扫描结束时的状态)；
+        # 传入上一段文本结束时的状态即可接着扫描，跨越分段边界的匹配不会遗漏
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        root_search = self._root_search
+        matches = []
+        i, n = 0, len(text)
+        while i < n:
+            if not state:
+                found = root_search(text, i)
+                if found is None:
+                    break
+                i = found.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            i += 1
+            for pattern in outputs[state]:
+                matches.append((i, pattern))
+        return matches, state
@@ -0,0 +1,276 @@
+import os
+import re
+import json
+import codecs
+import hashlib
+import sqlite3
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from keyword_automaton import KeywordAutomaton
+
+# 年报关键词计数模块
+# 用 keyword_categories 中的全部关键词构建一个多模式自动机，每份年报只扫描一遍；
+# 每个关键词的计数规则与 text.count(关键词) 一致（同一关键词不重叠计数，不同关键词各自计数），
+# 类别词频为该类别下各关键词计数之和。
+# 一个年份的全部年报在进程池中并行计数，汇总为每家企业一行的分类词频表，供指数计算使用。
+# 年报文件按固定大小分块读取、增量解码，自动机状态在块与块之间延续，
+# 跨越分块边界的关键词照常只计一次；每个工作进程的内存占用与单份年报的大小无关。
+# 每份年报的类别词频按 (文件内容哈希, 关键词定义哈希) 缓存在本地 SQLite 中，
+# 重新统计时只有新增或内容变化的年报需要计数；关键词定义变化后旧缓存自动清除。
+
+# 年报文本文件的扩展名
+REPORT_EXTENSIONS = ('.txt',)
+# 依次尝试的文本编码，都失败时按 UTF-8 替换无法解码的字符
+REPORT_ENCODINGS = ('utf-8-sig', 'gb18030')
+# 每次从文件读取并解码的字节数
+READ_CHUNK_BYTES = 1 << 20
+
+# 计数规则版本号，计数方式变化时递增，使旧缓存失效
+COUNTER_VERSION = 1
+
+# 文件名中的股票代码（6位数字）和需要从企业名称中去掉的部分
+_CODE_PATTERN = re.compile(r'(?<!\d)(\d{6})(?!\d)')
+_NAME_NOISE = re.compile(r'\d{4}年?|年度报告|年报|[_\-\s]+')
+
+
+class KeywordCounter:
+    # 关键词按类别出现的先后去重编号，同一关键词出现在多个类别时计入每个类别
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self.keywords = []
+        keyword_ids = {}
+        for words in categories.values():
+            for word in words:
+                if word not in keyword_ids:
+                    keyword_ids[word] = len(self.keywords)
+                    self.keywords.append(word)
+        # 关键词 × 类别 的归属矩阵，关键词计数乘以该矩阵即得类别词频
+        self.membership = np.zeros((len(self.keywords), len(self.categories)), dtype=np.int64)
+        for j, words in enumerate(categories.values()):
+            for word in words:
+                self.membership[keyword_ids[word], j] = 1
+        self.lengths = [len(word) for word in self.keywords]
+        self.automaton = KeywordAutomaton(self.keywords)
+
+    def tally(self):
+        return KeywordTally(self)
+
+    def count_text(self, text):
+        # 单份文本的类别词频 {类别: 次数}
+        tally = self.tally()
+        tally.feed(text)
+        return tally.category_counts()
+
+
+class KeywordTally:
+    # 单份文档的计数状态：文本可以分段依次传入，自动机状态和位置在段与段之间延续
+
+    def __init__(self, counter):
+        self.counter = counter
+        self.counts = [0] * len(counter.keywords)
+        # 每个关键词上一次计数的结束位置，用于实现不重叠计数
+        self.last_end = [0] * len(counter.keywords)
+        self.state = 0
+        self.offset = 0
+
+    def feed(self, text):
+        matches, self.state = self.counter.automaton.find_all(text, self.state)
+        lengths, counts, last_end = self.counter.lengths, self.counts, self.last_end
+        for end, keyword in matches:
+            end += self.offset
+            if end - lengths[keyword] >= last_end[keyword]:
+                counts[keyword] += 1
+                last_end[keyword] = end
+        self.offset += len(text)
+
+    def category_counts(self):
+        totals = np.asarray(self.counts, dtype=np.int64) @ self.counter.membership
+        return dict(zip(self.counter.categories, totals.tolist()))
+
+
+def iter_report_chunks(path, encoding, errors='strict', chunk_bytes=READ_CHUNK_BYTES):
+    # 按块读取并增量解码；多字节字符被分块截断时由解码器保留到下一块
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    with open(path, 'rb', buffering=0) as f:
+        for block in iter(lambda: f.read(chunk_bytes), b''):
+            text = decoder.decode(block)
+            if text:
+                yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def count_report_file(counter, path, chunk_bytes=READ_CHUNK_BYTES):
+    # 单份年报的类别词频；按 REPORT_ENCODINGS 依次尝试，解码失败时换下一种编码重新计数
+    for encoding in REPORT_ENCODINGS:
+        tally = counter.tally()
+        try:
+            for text in iter_report_chunks(path, encoding, chunk_bytes=chunk_bytes):
+                tally.feed(text)
+        except UnicodeDecodeError:
+            continue
+        return tally.category_counts()
+    tally = counter.tally()
+    for text in iter_report_chunks(path, 'utf-8', errors='replace', chunk_bytes=chunk_bytes):
+        tally.feed(text)
+    return tally.category_counts()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb', buffering=0) as f:
+        for block in iter(lambda: f.read(READ_CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def categories_hash(categories):
+    # 关键词定义（含类别顺序）与计数规则版本共同决定缓存是否可用
+    payload = json.dumps({'version': COUNTER_VERSION, 'categories': list(categories.items())}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CountCache:
+    # 单份年报类别词频的持久缓存；只在主进程中读写
+
+    def __init__(self, path, categories):
+        self.path = path
+        self.keywords_hash = categories_hash(categories)
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS report_counts ('
+                               'content_hash TEXT NOT NULL, keywords_hash TEXT NOT NULL, counts TEXT NOT NULL, '
+                               'PRIMARY KEY (content_hash, keywords_hash))')
+            # 关键词定义变化后，按旧定义统计的结果不再使用
+            self._conn.execute('DELETE FROM report_counts WHERE keywords_hash != ?', (self.keywords_hash,))
+
+    def get_many(self, content_hashes):
+        # 返回 {内容哈希: 类别词频}，同时累计命中/未命中次数
+        found = {}
+        unique = list(set(content_hashes))
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT content_hash, counts FROM report_counts WHERE keywords_hash = ? "
+                f"AND content_hash IN ({','.join('?' * len(batch))})", [self.keywords_hash] + batch)
+            found.update((content_hash, json.loads(counts)) for content_hash, counts in rows)
+        hits = sum(1 for h in content_hashes if h in found)
+        self.hits += hits
+        self.misses += len(content_hashes) - hits
+        return found
+
+    def put_many(self, items):
+        # items 为 [(内容哈希, 类别词频), ...]
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO report_counts VALUES (?, ?, ?)',
+                                   [(h, self.keywords_hash, json.dumps(counts, ensure_ascii=False)) for h, counts in items])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+    def close(self):
+        self._conn.close()
+
+
+def parse_report_name(path):
+    # 从文件名中取股票代码和企业名称，例如 "600008_首创股份_2020年年度报告.txt"
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = _CODE_PATTERN.search(stem)
+    code = match.group(1) if match else '未知'
+    name = _NAME_NOISE.sub('', _CODE_PATTERN.sub('', stem, count=1))
+    return code, name
+
+
+def list_reports(report_dir):
+    # 目录下（含子目录）全部年报文本文件，按路径排序
+    paths = []
+    for root, _, files in os.walk(report_dir):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(REPORT_EXTENSIONS))
+    return sorted(paths)
+
+
+# 进程池中每个工作进程只构建一次自动机
+_worker_counter = None
+
+
+def _init_worker(categories):
+    global _worker_counter
+    _worker_counter = KeywordCounter(categories)
+
+
+def _hash_report(path):
+    try:
+        return path, file_sha256(path), None
+    except Exception as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+
+def _count_report(path):
+    # 单份年报计数；读取失败时返回错误信息，不影响其他年报
+    try:
+        return path, count_report_file(_worker_counter, path), None
+    except Exception as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+
+def _map(executor, fn, items, chunksize):
+    if executor is None:
+        return [fn(item) for item in items]
+    return list(executor.map(fn, items, chunksize=chunksize))
+
+
+def count_reports(paths, categories, workers=None, chunksize=8, cache=None):
+    # 并行统计一组年报，返回 (每家企业一行的分类词频表, [(文件, 错误信息), ...], 缓存统计)
+    # 提供 cache 时先并行计算内容哈希，只对缓存中没有的年报计数
+    if workers == 1 or len(paths) <= 1:
+        _init_worker(categories)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(categories,))
+    counts_of = {}
+    errors = []
+    hashes = {}
+    to_count = paths
+    try:
+        if cache is not None:
+            for path, content_hash, error in _map(executor, _hash_report, paths, chunksize):
+                if error is not None:
+                    errors.append((path, error))
+                else:
+                    hashes[path] = content_hash
+            cached = cache.get_many(list(hashes.values()))
+            counts_of = {path: cached[h] for path, h in hashes.items() if h in cached}
+            to_count = [path for path in hashes if path not in counts_of]
+
+        new_counts = []
+        for path, counts, error in _map(executor, _count_report, to_count, chunksize):
+            if error is not None:
+                errors.append((path, error))
+                continue
+            counts_of[path] = counts
+            if cache is not None:
+                new_counts.append((hashes[path], counts))
+        if new_counts:
+            cache.put_many(new_counts)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    cache_stats = {'hits': len(hashes) - len(to_count) if cache is not None else 0, 'misses': len(to_count)}
+
+    records = []
+    for path in paths:
+        if path in counts_of:
+            code, name = parse_report_name(path)
+            records.append({'股票代码': code, '企业名称': name, **counts_of[path]})
+    columns = ['股票代码', '企业名称'] + list(categories)
+    table = pd.DataFrame(records, columns=columns)
+    # 同一企业有多份文本（如正文拆分为多个文件）时合计
+    table = table.groupby(['股票代码', '企业名称'], sort=False, as_index=False)[list(categories)].sum()
+    table['总词频数'] = table[list(categories)].sum(axis=1)
+    return table, errors, cache_stats
@@ -0,0 +1,190 @@
+import math
+import numpy as np
+import pandas as pd
+
+# 预聚合立方体模块
+# 加载时按 年份 × 行业 × 省份 粒度保存数字化转型指数和各技术维度的计数、总和与平方和，
+# 只按年份/行业筛选时，图表所需的均值直接由这些单元格汇总得到，与原始行数无关。
+# 相关性热力图所需的交叉乘积和另按 年份 × 行业 粒度保存，皮尔逊相关矩阵同样无需扫描原始行。
+
+INDEX_COLUMN = '数字化转型指数(0-100分)'
+TECH_DIMENSIONS = ['人工智能', '大数据', '云计算', '物联网', '区块链']
+MEASURE_COLUMNS = [INDEX_COLUMN] + TECH_DIMENSIONS
+CORRELATION_COLUMNS = [INDEX_COLUMN] + TECH_DIMENSIONS + ['总词频数']
+
+
+def _category_codes(series):
+    # 返回 (编码, 取值列表)，取值顺序与分类类型的类别顺序（即 groupby 的输出顺序）一致，缺失值编码为 -1
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), list(series.cat.categories)
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes, list(uniques)
+
+
+class AggregateCube:
+    # 只保存实际出现过的单元格；每个单元格记录行数，以及每个度量的总和与平方和
+
+    def __init__(self, df):
+        year_codes, self.years = _category_codes(df['年份'])
+        industry_codes, self.industries = _category_codes(df['行业名称'])
+        province_codes, self.provinces = _category_codes(df['省份'])
+        # 行业缺失的行单独占一个编码，不按行业筛选时仍计入技术维度和省份统计
+        self.missing_industry = len(self.industries)
+        industry_codes = np.where(industry_codes < 0, self.missing_industry, industry_codes)
+
+        n_industries = len(self.industries) + 1
+        n_provinces = len(self.provinces)
+        cell_ids = (year_codes.astype(np.int64) * n_industries + industry_codes) * n_provinces + province_codes
+        cells, cell_of_row = np.unique(cell_ids, return_inverse=True)
+        self.cell_year = cells // (n_industries * n_provinces)
+        self.cell_industry = cells // n_provinces % n_industries
+        self.cell_province = cells % n_provinces
+
+        n_cells = len(cells)
+        self.count = np.bincount(cell_of_row, minlength=n_cells)
+        self.sums = {}
+        self.sumsq = {}
+        for col in MEASURE_COLUMNS:
+            # 先转 float64 再求平方，避免紧凑化后的小整数类型溢出
+            values = df[col].to_numpy(dtype=np.float64)
+            self.sums[col] = np.bincount(cell_of_row, weights=values, minlength=n_cells)
+            self.sumsq[col] = np.bincount(cell_of_row, weights=values * values, minlength=n_cells)
+
+    def _cell_mask(self, years, industries):
+        # years / industries 为 None 表示不筛选；行业缺失的单元格只在不筛选行业时计入
+        mask = np.ones(len(self.count), dtype=bool)
+        if years is not None:
+            selected = set(years)
+            year_idx = [i for i, year in enumerate(self.years) if year in selected]
+            mask &= np.isin(self.cell_year, year_idx)
+        if industries is not None:
+            selected = set(industries)
+            industry_idx = [i for i, name in enumerate(self.industries) if name in selected]
+            mask &= np.isin(self.cell_industry, industry_idx)
+        return mask
+
+    def _grouped(self, keys, n_groups, mask, columns):
+        # 按给定单元格维度汇总，返回 (计数, {度量: 总和})
+        count = np.bincount(keys[mask], weights=self.count[mask], minlength=n_groups)
+        sums = {col: np.bincount(keys[mask], weights=self.sums[col][mask], minlength=n_groups) for col in columns}
+        return count, sums
+
+    def total_rows(self, years=None, industries=None):
+        return int(self.count[self._cell_mask(years, industries)].sum())
+
+    def measure_means(self, columns, years=None, industries=None):
+        # 等价于 filtered_df[columns].mean()
+        mask = self._cell_mask(years, industries)
+        count = self.count[mask].sum()
+        means = [self.sums[col][mask].sum() / count if count else np.nan for col in columns]
+        return pd.Series(means, index=columns, dtype=np.float64)
+
+    def measure_stats(self, column, years=None, industries=None):
+        # 返回 (计数, 均值, 样本标准差)，由总和与平方和直接计算
+        mask = self._cell_mask(years, industries)
+        count = self.count[mask].sum()
+        if not count:
+            return 0, np.nan, np.nan
+        total = self.sums[column][mask].sum()
+        mean = total / count
+        if count < 2:
+            return int(count), mean, np.nan
+        variance = max(self.sumsq[column][mask].sum() - total * mean, 0.0) / (count - 1)
+        return int(count), mean, np.sqrt(variance)
+
+    def industry_means(self, column, years=None, industries=None):
+        # 等价于 filtered_df.groupby('行业名称', observed=True)[column].mean().reset_index()
+        mask = self._cell_mask(years, industries) & (self.cell_industry != self.missing_industry)
+        count, sums = self._grouped(self.cell_industry, len(self.industries) + 1, mask, [column])
+        present = np.flatnonzero(count[:len(self.industries)])
+        return pd.DataFrame({
+            '行业名称': [self.industries[i] for i in present],
+            column: sums[column][present] / count[present],
+        })
+
+    def year_means(self, columns, years, industries=None):
+        # 每个所选年份的各度量均值，等价于逐年 filtered_df[filtered_df['年份'] == year][columns].mean()
+        mask = self._cell_mask(years, industries)
+        count, sums = self._grouped(self.cell_year, len(self.years), mask, columns)
+        year_pos = {year: i for i, year in enumerate(self.years)}
+        result = {}
+        for year in years:
+            i = year_pos.get(year)
+            n = count[i] if i is not None else 0
+            result[year] = pd.Series([sums[col][i] / n if n else np.nan for col in columns],
+                                     index=columns, dtype=np.float64)
+        return result
+
+    def province_stats(self, column, years=None, industries=None):
+        # 等价于 filtered_df.groupby('省份', observed=True)[column].agg(['mean', 'count']).reset_index()
+        mask = self._cell_mask(years, industries)
+        count, sums = self._grouped(self.cell_province, len(self.provinces), mask, [column])
+        present = np.flatnonzero(count)
+        return pd.DataFrame({
+            '省份': [self.provinces[i] for i in present],
+            'mean': sums[column][present] / count[present],
+            'count': count[present].astype(np.int64),
+        })
+
+
+class CorrelationStats:
+    # 按 年份 × 行业 保存各列的计数、总和与两两交叉乘积和（充分统计量）
+    # 整数列用 int64 累加，汇总后用 Python 整数计算分子，结果与逐行计算的相关系数一致
+
+    def __init__(self, df, columns=CORRELATION_COLUMNS):
+        self.columns = list(columns)
+        year_codes, self.years = _category_codes(df['年份'])
+        industry_codes, self.industries = _category_codes(df['行业名称'])
+        self.missing_industry = len(self.industries)
+        industry_codes = np.where(industry_codes < 0, self.missing_industry, industry_codes)
+
+        n_industries = len(self.industries) + 1
+        cells, cell_of_row = np.unique(year_codes.astype(np.int64) * n_industries + industry_codes,
+                                       return_inverse=True)
+        self.cell_year = cells // n_industries
+        self.cell_industry = cells % n_industries
+
+        exact = all(pd.api.types.is_integer_dtype(df[col]) for col in self.columns)
+        dtype = np.int64 if exact else np.float64
+        # 按单元格排序后用 reduceat 分段求和
+        order = np.argsort(cell_of_row, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(cell_of_row[order]) != 0])
+        values = [df[col].to_numpy(dtype=dtype)[order] for col in self.columns]
+
+        k = len(self.columns)
+        self.count = np.bincount(cell_of_row, minlength=len(cells)).astype(np.int64)
+        self.sums = np.stack([np.add.reduceat(v, starts) for v in values], axis=1)
+        self.cross = np.zeros((len(cells), k, k), dtype=dtype)
+        for i in range(k):
+            for j in range(i, k):
+                self.cross[:, i, j] = self.cross[:, j, i] = np.add.reduceat(values[i] * values[j], starts)
+
+    def _cell_mask(self, years, industries):
+        mask = np.ones(len(self.count), dtype=bool)
+        if years is not None:
+            selected = set(years)
+            mask &= np.isin(self.cell_year, [i for i, year in enumerate(self.years) if year in selected])
+        if industries is not None:
+            selected = set(industries)
+            mask &= np.isin(self.cell_industry, [i for i, name in enumerate(self.industries) if name in selected])
+        return mask
+
+    def corr(self, years=None, industries=None):
+        # 等价于 filtered_df[columns].corr()；方差为 0 或样本不足时为 NaN（与 pandas 一致）
+        mask = self._cell_mask(years, industries)
+        n = int(self.count[mask].sum())
+        sums = self.sums[mask].sum(axis=0).tolist()
+        cross = self.cross[mask].sum(axis=0).tolist()
+        k = len(self.columns)
+        # n * Σxy - Σx * Σy，整数列时为精确值
+        centered = [[n * cross[i][j] - sums[i] * sums[j] for j in range(k)] for i in range(k)]
+        result = np.full((k, k), np.nan)
+        for i in range(k):
+            for j in range(k):
+                if n < 2 or centered[i][i] <= 0 or centered[j][j] <= 0:
+                    continue
+                if i == j:
+                    result[i, j] = 1.0
+                else:
+                    result[i, j] = centered[i][j] / math.sqrt(centered[i][i] * centered[j][j])
+        return pd.DataFrame(result, index=self.columns, columns=self.columns)
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+from province_matcher import province_column
+
+# 面板数据加载模块
+# 合并表（xlsx）首次加载后会在旁边写一份列式缓存（Parquet），
+# 之后的冷启动直接读取缓存；工作簿的大小、修改时间或内容变化时自动重建。
+# 加载后先计算派生列（省份），再经过一次紧凑化处理，以减少每个进程和每次缓存拷贝的内存占用。
+# 最后把各列底层数组设为只读：应用在进程内只保留一份面板供所有会话共享，任何原地修改都会直接报错，
+# 而筛选、切片得到的新对象按写时复制照常可以修改。
+
+# 缓存格式版本号，缓存结构变化时递增，使旧缓存自动失效
+CACHE_VERSION = 1
+
+
+def sidecar_paths(file_path):
+    # 缓存文件与元数据文件放在工作簿旁边
+    base, _ = os.path.splitext(file_path)
+    return base + '.cache.parquet', base + '.cache.json'
+
+
+def workbook_signature(file_path):
+    # 以文件大小、修改时间和内容哈希作为缓存键
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest.hexdigest(),
+    }
+
+
+def _read_sidecar(cache_path, meta_path, signature):
+    if not (os.path.exists(cache_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta != signature:
+            return None
+        return pd.read_parquet(cache_path)
+    except Exception:
+        # 缓存损坏或缺少 Parquet 引擎时退回读取工作簿
+        return None
+
+
+def _write_sidecar(df, cache_path, meta_path, signature):
+    # 先写临时文件再原子替换，避免并发进程读到写了一半的缓存
+    tmp_cache = f'{cache_path}.{os.getpid()}.tmp'
+    tmp_meta = f'{meta_path}.{os.getpid()}.tmp'
+    try:
+        df.to_parquet(tmp_cache, index=False)
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(signature, f)
+        os.replace(tmp_cache, cache_path)
+        os.replace(tmp_meta, meta_path)
+        return True
+    except Exception:
+        # 目录只读或没有 Parquet 引擎时不写缓存，不影响正常加载
+        for tmp in (tmp_cache, tmp_meta):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return False
+
+
+# 低基数的文本列转为分类类型
+CATEGORY_COLUMNS = ['企业名称', '行业名称', '行业代码', '省份']
+
+# 需要向下转换为最小安全整数类型的数值列
+NUMERIC_COLUMNS = ['年份', '数字化转型指数(0-100分)', '人工智能', '大数据', '云计算', '物联网', '区块链',
+                   '数字技术基础设施', '数字化应用场景', '总词频数']
+
+
+def _downcast_integer(series):
+    # 只有全部为整数值且无缺失时才转换，保证数值不变；
+    # 统一使用有符号类型，避免后续做差（如排名变化）时无符号回绕
+    if series.isna().any():
+        return series
+    if pd.api.types.is_float_dtype(series) and not np.array_equal(series.values, np.round(series.values)):
+        return series
+    return pd.to_numeric(series, downcast='integer')
+
+
+def normalize_stock_codes(series):
+    # 股票代码统一为定长整数键（'000001'、1、'1' 都归一为 1）；含非数字代码时保持原样
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype(np.int32)
+    codes = pd.to_numeric(series.astype(str).str.strip(), errors='coerce')
+    if codes.isna().any():
+        return series
+    return codes.astype(np.int32)
+
+
+def add_derived_columns(df):
+    # 派生列只在加载时计算一次，随数据一起缓存
+    df = df.copy()
+    if '企业名称' in df.columns:
+        # 从企业名称中提取省份信息
+        df['省份'] = province_column(df['企业名称'])
+    return df
+
+
+def compact_panel(df):
+    # 返回 (紧凑化后的DataFrame, 内存报告)，内存单位为字节
+    memory_before = int(df.memory_usage(deep=True).sum())
+    df = df.copy()
+
+    if '股票代码' in df.columns:
+        df['股票代码'] = normalize_stock_codes(df['股票代码'])
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = _downcast_integer(df[col])
+
+    memory_after = int(df.memory_usage(deep=True).sum())
+    memory_report = {
+        'before': memory_before,
+        'after': memory_after,
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+    }
+    return df, memory_report
+
+
+def freeze_panel(df):
+    # 返回共享同一份数据、但数值列和分类编码只读的 DataFrame（只建只读视图，不复制数据）；
+    # 文本列由 Arrow 数组存储，本身不可原地修改。
+    # 只读标记只能阻止原地写入取值，df['x'] = ...、drop(..., inplace=True) 等增删改列的操作仍会作用于这个对象本身；
+    # 这个对象在进程内共享，交给各会话使用前应先用 panel_view 取浅拷贝
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy().view()
+            codes.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(codes, dtype=series.dtype)
+        elif isinstance(series.dtype, np.dtype):
+            values = series.to_numpy().view()
+            values.flags.writeable = False
+            columns[col] = values
+        else:
+            columns[col] = series.array
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def panel_view(df):
+    # 共享面板的浅拷贝：与共享面板使用同一份数据（只复制列索引等元数据，约几 KB），
+    # 增删改列、原地排序等结构性修改只作用于这份拷贝，写入取值时按写时复制生成副本，都不影响共享面板
+    return df.copy(deep=False)
+
+
+def load_panel(file_path):
+    # 返回 (DataFrame, 加载信息)，加载信息用于调试面板展示冷启动耗时
+    start = time.perf_counter()
+    signature = workbook_signature(file_path)
+    cache_path, meta_path = sidecar_paths(file_path)
+
+    df = _read_sidecar(cache_path, meta_path, signature)
+    if df is not None:
+        source = '列式缓存'
+        cache_written = False
+    else:
+        df = pd.read_excel(file_path)
+        source = 'Excel工作簿'
+        cache_written = _write_sidecar(df, cache_path, meta_path, signature)
+    read_done = time.perf_counter()
+
+    df = add_derived_columns(df)
+    derived_done = time.perf_counter()
+    df, memory_report = compact_panel(df)
+    df = freeze_panel(df)
+
+    load_info = {
+        'source': source,
+        'seconds': time.perf_counter() - start,
+        # 各阶段耗时（秒）：读取、派生列（省份提取）、紧凑化
+        'stages': {
+            'read': read_done - start,
+            'derived': derived_done - read_done,
+            'compact': time.perf_counter() - derived_done,
+        },
+        'memory': memory_report,
+        'cache_path': cache_path,
+        'cache_written': cache_written,
+        'sha256': signature['sha256'],
+    }
+    return df, load_info
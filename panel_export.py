@@ -0,0 +1,87 @@
+import io
+import gzip
+
+# 筛选结果导出模块
+# 直接按筛选引擎得到的行号分块读取原数据并逐块写出，不再构造一份完整的筛选结果副本；
+# 无论选择多少年份，中间数据最多只有一个分块。
+# 支持 CSV（可 gzip 压缩）、Excel（XlsxWriter 常量内存模式）和 Parquet 三种格式。
+
+# 每个分块的行数
+CHUNK_ROWS = 20000
+
+# 格式名称 -> (文件扩展名, MIME 类型)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+# Excel 工作表的最大行数（含表头）
+XLSX_MAX_ROWS = 1048576
+
+
+def iter_chunks(df, rows, chunk_rows=CHUNK_ROWS):
+    # 按行号分块取出数据，每次只有一个分块在内存中
+    for start in range(0, len(rows), chunk_rows):
+        yield df.iloc[rows[start:start + chunk_rows]]
+
+
+def write_csv(df, rows, out, compress=False):
+    # CSV 使用带 BOM 的 UTF-8，Excel 直接打开时中文不乱码
+    raw = gzip.GzipFile(fileobj=out, mode='wb', mtime=0) if compress else out
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    try:
+        df.iloc[:0].to_csv(text, index=False)
+        for chunk in iter_chunks(df, rows):
+            chunk.to_csv(text, index=False, header=False)
+        text.flush()
+    finally:
+        # 只关闭 gzip 流，保留 out 供调用方读取
+        text.detach()
+        if compress:
+            raw.close()
+
+
+def write_xlsx(df, rows, out):
+    import xlsxwriter
+    if len(rows) >= XLSX_MAX_ROWS:
+        raise ValueError(f"筛选结果共 {len(rows):,} 行，超过 Excel 单个工作表的行数上限，请改用 CSV 或 Parquet 格式")
+    # 常量内存模式下逐行写出，已写完的行立即刷到临时文件
+    workbook = xlsxwriter.Workbook(out, {'constant_memory': True, 'nan_inf_to_errors': True})
+    sheet = workbook.add_worksheet('数据')
+    sheet.write_row(0, 0, list(df.columns))
+    row_num = 1
+    for chunk in iter_chunks(df, rows):
+        # 转成 Python 原生值逐行写出；缺失值为 None，写出为空单元格
+        columns = [chunk[col].astype(object).where(chunk[col].notna(), None).tolist() for col in chunk.columns]
+        for values in zip(*columns):
+            sheet.write_row(row_num, 0, values)
+            row_num += 1
+    workbook.close()
+
+
+def write_parquet(df, rows, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    # 以完整数据的结构为准，分类列的字典在各分块之间保持一致
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in iter_chunks(df, rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def export_rows(df, rows, fmt):
+    # 按格式名称导出给定行号的数据，返回文件字节；供 st.download_button 的 data 回调使用
+    out = io.BytesIO()
+    if fmt == 'CSV':
+        write_csv(df, rows, out)
+    elif fmt == 'CSV (gzip)':
+        write_csv(df, rows, out, compress=True)
+    elif fmt == 'Excel':
+        write_xlsx(df, rows, out)
+    elif fmt == 'Parquet':
+        write_parquet(df, rows, out)
+    else:
+        raise ValueError(f"不支持的导出格式：{fmt}")
+    return out.getvalue()
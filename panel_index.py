@@ -0,0 +1,225 @@
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from instrumentation import record_miss
+
+# 面板筛选索引模块
+# 加载时为年份、行业、股票代码各建一份倒排索引（取值 -> 有序行号数组），
+# 侧边栏的任意筛选组合都转化为行号数组的并集/交集运算，不再逐行构造布尔掩码。
+# 企业名称的模糊查询通过不重复企业名称上的字符 n-gram 索引完成。
+# 筛选结果连同顶部指标按规范化后的侧边栏状态缓存在进程内的有界 LRU 中。
+# 数据表格分页显示：主要数值列预先计算全表排序置换，任意筛选结果按置换过滤即得有序行号。
+
+# 出现这些字符时查询词按正则表达式处理（与 str.contains 的默认行为一致）
+_REGEX_CHARS = set('.^$*+?{}[]\\|()')
+
+
+def _inverted_index(values):
+    # 返回 {取值: 升序行号数组}，缺失值不进入索引（与 isin 不匹配缺失值一致）
+    codes, uniques = pd.factorize(values, sort=False)
+    valid = codes >= 0
+    rows = np.flatnonzero(valid)
+    codes = codes[valid]
+    # 稳定排序保证每个取值下的行号保持升序
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(uniques))
+    groups = np.split(rows[order], np.cumsum(counts)[:-1]) if len(uniques) else []
+    return {key: group for key, group in zip(uniques, groups)}
+
+
+def _union(index, keys):
+    # 各取值的行号互不相交，拼接后排序即为并集
+    parts = [index[key] for key in keys if key in index]
+    if not parts:
+        return np.empty(0, dtype=np.int64)
+    if len(parts) == 1:
+        return parts[0]
+    return np.sort(np.concatenate(parts))
+
+
+class NameIndex:
+    # 企业名称模糊查询索引：在不重复的企业名称上建立单字和二元字符索引
+
+    def __init__(self, names):
+        # 企业名称 -> 升序行号数组
+        self.name_rows = _inverted_index(names.astype(object))
+        self.names = np.array(list(self.name_rows), dtype=object)
+        self.lower_names = [name.lower() for name in self.names]
+        # 字符 n-gram -> 包含该 n-gram 的企业名称编号（小写化后建立，同时服务区分/不区分大小写的查询）
+        postings = {}
+        for name_id, name in enumerate(self.lower_names):
+            grams = set(name)
+            grams.update(name[i:i + 2] for i in range(len(name) - 1))
+            for gram in grams:
+                postings.setdefault(gram, []).append(name_id)
+        self.postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def _candidates(self, term):
+        # 查询词所有二元字符（单字查询用单字）对应名称编号的交集，是真实结果的超集
+        if len(term) == 1:
+            grams = [term]
+        else:
+            grams = list({term[i:i + 2] for i in range(len(term) - 1)})
+        lists = [self.postings.get(gram) for gram in grams]
+        if any(ids is None for ids in lists):
+            return np.empty(0, dtype=np.int64)
+        lists.sort(key=len)
+        result = lists[0]
+        for ids in lists[1:]:
+            result = np.intersect1d(result, ids, assume_unique=True)
+            if not len(result):
+                break
+        return result
+
+    def match_names(self, term, ignore_case=True):
+        # 返回包含查询词的企业名称编号
+        if _REGEX_CHARS & set(term):
+            # 含正则元字符的查询词只在不重复名称上扫描，不扫描全部行；
+            # 不是合法正则（如 '*ST'）时按普通文本匹配
+            try:
+                pattern = re.compile(term, re.IGNORECASE if ignore_case else 0)
+            except re.error:
+                pattern = None
+            if pattern is not None:
+                return np.array([i for i, name in enumerate(self.names) if pattern.search(name)], dtype=np.int64)
+            return np.array([i for i, name in enumerate(self.names)
+                             if (term.lower() in name.lower() if ignore_case else term in name)], dtype=np.int64)
+        lower_term = term.lower()
+        candidates = self._candidates(lower_term)
+        if ignore_case:
+            return np.array([i for i in candidates if lower_term in self.lower_names[i]], dtype=np.int64)
+        return np.array([i for i in candidates if term in self.names[i]], dtype=np.int64)
+
+    def rows_for_terms(self, terms, ignore_case=True):
+        # 多个查询词的匹配结果取并集，返回升序行号
+        name_ids = set()
+        for term in terms:
+            if term:
+                name_ids.update(self.match_names(term, ignore_case).tolist())
+        return _union(self.name_rows, self.names[sorted(name_ids)])
+
+
+class FilterEngine:
+    # 年份 / 行业 / 股票代码 / 企业名称筛选引擎，结果为原数据的升序行号数组
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.all_rows = np.arange(self.n_rows)
+        self.year_values = df['年份'].to_numpy()
+        self.year_rows = {int(year): rows for year, rows in _inverted_index(df['年份'].to_numpy()).items()}
+        self.industry_rows = _inverted_index(df['行业名称'].astype(object))
+        # 股票代码按字符串形式建索引，与 astype(str).isin 的匹配规则一致；只在加载时转换一次
+        self.stock_code_rows = _inverted_index(df['股票代码'].astype(str).to_numpy(dtype=object))
+        self.name_index = NameIndex(df['企业名称'])
+
+    def select(self, years=None, industries=None, stock_codes=None, name_terms=None, ignore_case=True):
+        # 参数为 None 表示不按该维度筛选；空列表表示该维度没有任何匹配
+        rows = self.all_rows
+        if years is not None:
+            rows = _union(self.year_rows, [int(year) for year in years])
+        if industries is not None:
+            rows = np.intersect1d(rows, _union(self.industry_rows, industries), assume_unique=True)
+        if stock_codes is not None:
+            rows = np.intersect1d(rows, _union(self.stock_code_rows, stock_codes), assume_unique=True)
+        if name_terms is not None:
+            rows = np.intersect1d(rows, self.name_index.rows_for_terms(name_terms, ignore_case), assume_unique=True)
+        return rows
+
+    def years_of(self, rows):
+        # 给定行号对应的年份（去重、升序）
+        return sorted(np.unique(self.year_values[rows]))
+
+
+# 数据表格可排序的数值列
+SORT_COLUMNS = ['数字化转型指数(0-100分)', '年份', '股票代码', '人工智能', '大数据', '云计算', '物联网', '区块链', '总词频数']
+
+
+class SortIndex:
+    # 每列保存升序、降序两个稳定排序置换（相同取值保持原始行序，与 sort_values(kind='stable') 一致）
+
+    def __init__(self, df, columns=SORT_COLUMNS):
+        self.n_rows = len(df)
+        self.orders = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy()
+            if pd.api.types.is_integer_dtype(values.dtype):
+                values = values.astype(np.int64)
+            self.orders[(col, False)] = np.argsort(values, kind='stable')
+            self.orders[(col, True)] = np.argsort(-values, kind='stable')
+
+    def ordered(self, rows, column=None, descending=False):
+        # 按给定列排序后的行号；column 为 None 时保持原始行序
+        if column is None:
+            return rows
+        order = self.orders[(column, descending)]
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[rows] = True
+        return order[selected[order]]
+
+    def page(self, rows, page, page_size, column=None, descending=False):
+        # 第 page 页（从 1 开始）的行号，只取当前页需要的部分
+        start = (page - 1) * page_size
+        return self.ordered(rows, column, descending)[start:start + page_size]
+
+
+def take_rows(df, rows):
+    # 按行号取子集；选中全部行时返回浅拷贝，不复制数据，调用方修改结构也不影响原数据
+    if len(rows) == len(df):
+        return df.copy(deep=False)
+    return df.iloc[rows]
+
+
+def filter_key(years=None, industries=None, stock_codes=None, name_terms=None):
+    # 侧边栏状态的规范形式：与选择顺序、重复输入无关；None（不筛选）与空列表（无匹配）区分开
+    def canonical(values, convert=str):
+        return None if values is None else tuple(sorted({convert(v) for v in values}))
+    return (canonical(years, int), canonical(industries), canonical(stock_codes), canonical(name_terms))
+
+
+def summary_metrics(df, rows):
+    # 顶部指标：总记录数、平均指数、最高指数、企业数量
+    index_values = df['数字化转型指数(0-100分)'].to_numpy()[rows]
+    names = df['企业名称']
+    name_codes = names.cat.codes.to_numpy() if isinstance(names.dtype, pd.CategoricalDtype) else pd.factorize(names)[0]
+    companies = pd.unique(name_codes[rows])
+    return {
+        'total_rows': len(rows),
+        'avg_index': round(index_values.mean(), 2) if len(rows) else np.nan,
+        'max_index': index_values.max() if len(rows) else np.nan,
+        'companies': int((companies >= 0).sum()),
+    }
+
+
+class FilterCache:
+    # 有界 LRU 缓存，记录命中/未命中次数；多个会话线程共享，读写加锁
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        record_miss()
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
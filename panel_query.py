@@ -0,0 +1,250 @@
+import threading
+import numpy as np
+import pandas as pd
+from instrumentation import record_miss
+from panel_data import load_panel
+from panel_index import FilterEngine, FilterCache, SortIndex, filter_key, summary_metrics, take_rows
+from panel_cube import AggregateCube, CorrelationStats, INDEX_COLUMN, TECH_DIMENSIONS, CORRELATION_COLUMNS
+from panel_series import CompanySeries
+from panel_rank import RankTable
+
+# 无界面查询模块
+# 面板加载一次后即可直接调用筛选、顶部指标、行业排名、省份汇总、技术维度均值、相关系数和企业历史，
+# 不依赖 Streamlit；仪表盘和本地 JSON 接口（panel_server.py）共用这里的计算，两边结果一致。
+# 筛选条件统一为 years / industries / stock_codes / name_terms 四个参数：None 表示不按该维度筛选，空列表表示没有匹配。
+# 只按年份、行业筛选且只涉及指数和技术维度列时读取预聚合立方体，涉及其他列或带股票代码、企业名称条件时直接在筛选出的行号上逐列计算，不复制子表。
+# 企业历史和多企业趋势读取按 (股票代码, 年份) 排好的时间序列（panel_series），不扫描全表。
+# 行业内、年份内的名次、百分位和排名变化在构建时一次算好（panel_rank），排行榜只做切片。
+
+# 中国所有省份列表（省份汇总按此顺序补齐没有企业的省份）
+ALL_PROVINCES = ['北京', '上海', '广东', '江苏', '浙江', '山东', '福建', '河南', '湖北', '湖南',
+                 '四川', '河北', '安徽', '江西', '辽宁', '陕西', '山西', '黑龙江', '吉林', '云南',
+                 '贵州', '广西', '天津', '重庆', '内蒙古', '新疆', '甘肃', '宁夏', '青海', '西藏', '海南']
+
+# 企业历史返回的列
+HISTORY_COLUMNS = ['年份', '股票代码', '企业名称', '行业名称', '省份', INDEX_COLUMN] + TECH_DIMENSIONS + ['总词频数']
+
+# 排行榜返回的列（另加所在分组的名次、企业数、百分位和排名变化）
+LEADERBOARD_COLUMNS = ['股票代码', '企业名称', '年份', '行业名称', INDEX_COLUMN]
+
+
+def _nan_means(values):
+    # 二维数组 (列, 行) 逐列忽略缺失值求均值，没有取值的列为 NaN（与 DataFrame.mean() 一致）
+    counts = (~np.isnan(values)).sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nansum(values, axis=-1) / counts
+
+
+class PanelQuery:
+    # 一份面板上的全部查询；筛选索引、企业时间序列和排名在构建时建立，排序置换、预聚合立方体等在第一次用到时建立，多线程共享
+
+    def __init__(self, df, load_info=None):
+        # df 可以是进程内共享的只读面板（panel_data.freeze_panel），查询只读取不修改；
+        # 调用方不要修改 self.df 的列，需要修改时先用 panel_data.panel_view 取浅拷贝
+        self.df = df
+        self.load_info = load_info or {}
+        self.engine = FilterEngine(df)
+        self.series = CompanySeries(df)
+        self.ranks = RankTable(df, self.series)
+        # 筛选行号和顶部指标的结果缓存
+        self.cache = FilterCache(maxsize=256)
+        self._lock = threading.Lock()
+        self._sort_index = None
+        self._cube = None
+        self._correlation = None
+
+    @classmethod
+    def from_file(cls, file_path):
+        return cls(*load_panel(file_path))
+
+    def _build(self, attr, factory):
+        # 延迟构建的结构只建一次
+        with self._lock:
+            if getattr(self, attr) is None:
+                record_miss()
+                setattr(self, attr, factory(self.df))
+            return getattr(self, attr)
+
+    @property
+    def sort_index(self):
+        return self._sort_index or self._build('_sort_index', SortIndex)
+
+    @property
+    def cube(self):
+        return self._cube or self._build('_cube', AggregateCube)
+
+    @property
+    def correlation_stats(self):
+        return self._correlation or self._build('_correlation', CorrelationStats)
+
+    # 筛选
+
+    def select(self, years=None, industries=None, stock_codes=None, name_terms=None):
+        # 升序行号
+        filters = dict(years=years, industries=industries, stock_codes=stock_codes, name_terms=name_terms)
+        return self.cache.get_or_compute(filter_key(**filters), lambda: self.engine.select(**filters))
+
+    def filtered(self, **filters):
+        # 筛选结果的完整子表（会复制选中的行）；页面和聚合查询只使用行号，不调用此方法
+        return take_rows(self.df, self.select(**filters))
+
+    def _values(self, column, rows):
+        # 某一列在给定行上的 float64 数组，只取这些行
+        return self.df[column].array.take(rows).to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def _group_stats(self, by, column, rows):
+        # 给定行按分类列分组的均值和个数，与 groupby(by, observed=True)[column].agg(['mean', 'count']) 一致
+        groups = self.df[by]
+        if isinstance(groups.dtype, pd.CategoricalDtype):
+            codes, categories = groups.cat.codes.to_numpy()[rows], groups.cat.categories
+        else:
+            codes, categories = pd.factorize(groups.array.take(rows), sort=True)
+        values = self._values(column, rows)
+        grouped, valid = codes >= 0, (codes >= 0) & ~np.isnan(values)
+        present = np.bincount(codes[grouped], minlength=len(categories)) > 0
+        count = np.bincount(codes[valid], minlength=len(categories))
+        sums = np.bincount(codes[valid], weights=values[valid], minlength=len(categories))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / count
+        return pd.DataFrame({by: np.asarray(categories)[present], 'mean': means[present], 'count': count[present]})
+
+    def summary(self, **filters):
+        # 顶部指标：总记录数、平均指数、最高指数、企业数量
+        rows = self.select(**filters)
+        return self.cache.get_or_compute(('summary', filter_key(**filters)), lambda: summary_metrics(self.df, rows))
+
+    def page(self, page, page_size, column=None, descending=False, **filters):
+        # 筛选结果按列排序后的第 page 页（从 1 开始）
+        rows = self.sort_index.page(self.select(**filters), page, page_size, column, descending)
+        return self.df.iloc[rows]
+
+    def _cached(self, key, compute):
+        # 小型聚合结果按 (查询, 参数, 筛选条件) 缓存；返回副本，调用方修改不影响缓存
+        return self.cache.get_or_compute(key, compute).copy()
+
+    @staticmethod
+    def uses_cube(stock_codes=None, name_terms=None, **_):
+        # 没有企业级筛选条件时可以直接读取预聚合立方体
+        return stock_codes is None and name_terms is None
+
+    def _from_cube(self, columns, filters):
+        # 立方体只保存指数和技术维度列，其他列仍按行计算
+        return self.uses_cube(**filters) and all(col in self.cube.sums for col in columns)
+
+    # 聚合
+
+    def industry_ranking(self, column=INDEX_COLUMN, top=20, **filters):
+        # 各行业平均值降序排名，行业名称为字符串
+        return self._cached(('industries', column, top, filter_key(**filters)),
+                            lambda: self._industry_ranking(column, top, filters))
+
+    def _industry_ranking(self, column, top, filters):
+        if self._from_cube([column], filters):
+            ranking = self.cube.industry_means(column, filters.get('years'), filters.get('industries'))
+        else:
+            stats = self._group_stats('行业名称', column, self.select(**filters))
+            ranking = stats[['行业名称', 'mean']].rename(columns={'mean': column})
+        ranking = ranking.sort_values(column, ascending=False)
+        if top is not None:
+            ranking = ranking.head(top)
+        # 行业名称为分类类型，转回字符串以免图表显示未出现的行业
+        ranking['行业名称'] = ranking['行业名称'].astype(str)
+        return ranking
+
+    def measure_means(self, columns=TECH_DIMENSIONS, **filters):
+        # 各列均值（Series，按 columns 顺序）
+        if self._from_cube(columns, filters):
+            return self.cube.measure_means(list(columns), filters.get('years'), filters.get('industries'))
+        rows = self.select(**filters)
+        return pd.Series(_nan_means(np.array([self._values(col, rows) for col in columns]).reshape(len(columns), -1)),
+                         index=list(columns), dtype=np.float64)
+
+    def year_means(self, columns=TECH_DIMENSIONS, **filters):
+        # 按 years 给出的顺序返回 [(年份, 各列均值数组), ...]
+        years = filters.get('years') or []
+        if self._from_cube(columns, filters):
+            means = self.cube.year_means(list(columns), years, filters.get('industries'))
+            return [(year, means[year].values) for year in years]
+        rows = self.select(**filters)
+        values = np.array([self._values(col, rows) for col in columns]).reshape(len(columns), -1)
+        row_years = self.df['年份'].to_numpy()[rows]
+        return [(year, _nan_means(values[:, row_years == year])) for year in years]
+
+    def correlation(self, columns=CORRELATION_COLUMNS, **filters):
+        # 皮尔逊相关矩阵
+        if self.uses_cube(**filters) and list(columns) == self.correlation_stats.columns:
+            # 由年份 × 行业的交叉乘积和直接计算相关系数，不扫描原始行
+            return self.correlation_stats.corr(filters.get('years'), filters.get('industries'))
+        rows = self.select(**filters)
+        return pd.DataFrame({col: self._values(col, rows) for col in columns}).corr()
+
+    def province_averages(self, column=INDEX_COLUMN, **filters):
+        # 全部省份的平均指数和企业数量（没有企业的省份记为 0），不含"全国"
+        return self._cached(('provinces', column, filter_key(**filters)),
+                            lambda: self._province_averages(column, filters))
+
+    def _province_averages(self, column, filters):
+        if self._from_cube([column], filters):
+            province_data = self.cube.province_stats(column, filters.get('years'), filters.get('industries'))
+        else:
+            province_data = self._group_stats('省份', column, self.select(**filters))
+        province_data.columns = ['省份', '平均数字化转型指数', '企业数量']
+        province_data['省份'] = province_data['省份'].astype(str)
+
+        # 将'全国'类别的数据排除（如果存在）
+        if not province_data.empty and '全国' in province_data['省份'].values:
+            province_data = province_data[province_data['省份'] != '全国']
+
+        # 创建所有省份的数据框，确保每个省份都有数据
+        province_data = pd.merge(pd.DataFrame({'省份': ALL_PROVINCES}), province_data, on='省份', how='left')
+        province_data['平均数字化转型指数'] = province_data['平均数字化转型指数'].fillna(0)
+        province_data['企业数量'] = province_data['企业数量'].fillna(0).astype(int)
+        return province_data
+
+    def top_companies(self, n=10, column=INDEX_COLUMN, with_ranks=False, **filters):
+        # 与 filtered.nlargest(n, column) 一致：降序，取值相同时保持原始行序，缺失值不参与
+        rows = self.select(**filters)
+        values = self.df[column].to_numpy(dtype=np.float64, na_value=np.nan)[rows]
+        rows, values = rows[~np.isnan(values)], values[~np.isnan(values)]
+        # n 不为正时返回空表，负数不能当作切片的结束位置
+        top = rows[np.argsort(-values, kind='stable')[:max(n, 0)]]
+        return self._rows(top, ['企业名称', '年份', '行业名称', column], ('行业', '年度') if with_ranks else ())
+
+    def _rows(self, rows, columns, rank_prefixes=()):
+        # 原数据中给定行的给定列，并在右侧附加预先算好的排名列（'行业'、'年度' 两组中的若干组）
+        # 逐列取值后一次构建，避免逐列插入 DataFrame 的开销
+        # 列名去重（如按年份查询最高值时度量列与年份列相同），保持首次出现的顺序
+        data = {col: self.df[col].array.take(rows) for col in dict.fromkeys(columns)}
+        data.update(self.ranks.columns(rows, rank_prefixes))
+        return pd.DataFrame(data, index=self.df.index[rows])
+
+    # 企业
+
+    def years_of(self, **filters):
+        # 满足条件的行覆盖的年份（升序）
+        return self.engine.years_of(self.engine.select(**filters))
+
+    def company_history(self, stock_code, columns=HISTORY_COLUMNS, with_ranks=False):
+        # 单家企业各年份的数据，按年份升序
+        return self._rows(self.series.rows(stock_code), columns, ('行业', '年度') if with_ranks else ())
+
+    def company_trends(self, stock_codes, column=INDEX_COLUMN):
+        # 多家企业某一度量的逐年宽表（行为年份，列为"股票代码 企业名称"）
+        return self.series.trends(stock_codes, column)
+
+    def company_codes(self, n=5, column=INDEX_COLUMN, **filters):
+        # 筛选结果中该度量最高的 n 家企业的股票代码（按最高值降序，每家企业只取一次）
+        rows = self.select(**filters)
+        values = self.df[column].to_numpy(dtype=np.float64, na_value=np.nan)[rows]
+        rows = rows[~np.isnan(values)][np.argsort(-values[~np.isnan(values)], kind='stable')]
+        codes = pd.unique(self.df['股票代码'].to_numpy()[rows])
+        return codes[:n].tolist()
+
+    # 排名
+
+    def leaderboard(self, year, industry=None, n=10):
+        # 某年某行业（industry 为 None 时为当年全部企业）的排行榜：
+        # {'top': 前 n 名, 'bottom': 后 n 名, 'risers': 名次上升最多, 'fallers': 名次下降最多}，各为一个 DataFrame
+        prefix = '行业' if industry is not None else '年度'
+        return {name: self._rows(rows, LEADERBOARD_COLUMNS, (prefix,)).reset_index(drop=True)
+                for name, rows in self.ranks.leaderboard(year, industry, max(n, 0)).items()}
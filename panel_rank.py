@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from panel_cube import INDEX_COLUMN
+
+# 排名模块
+# 加载时对数字化转型指数做两次分组排名：年份 × 行业内、年份内；每次排名是一次按 (组, 取值降序) 的排序，
+# 由排序结果直接得到每行的名次、百分位和组内企业数，同一企业相邻两年的名次之差即为排名变化。
+# 排序结果按组连续保存并记录偏移，排行榜的前 N 名、后 N 名、排名上升/下降最多的企业都是一次字典查找加一段切片，
+# 页面重新运行时不再排序。
+# 名次为降序的并列最小名次（1 为最高，取值相同的企业名次相同）；百分位为组内取值不高于该企业的比例（0-100）。
+
+
+class RankGroups:
+    # 一种分组方式下的排名；group_ids 为 -1 或取值缺失的行不参与排名（名次记为 0）
+
+    def __init__(self, group_ids, values, pairs):
+        n = len(values)
+        valid = (group_ids >= 0) & ~np.isnan(values)
+        self.keys, group_of_row = np.unique(group_ids[valid], return_inverse=True)
+        self.group_index = {key: i for i, key in enumerate(self.keys.tolist())}
+        rows = np.flatnonzero(valid)
+        # 组内按取值降序；取值相同时保持原始行序
+        order = np.lexsort((-values[rows], group_of_row))
+        self.order = rows[order]
+        sorted_groups = group_of_row[order]
+        sorted_values = values[self.order]
+        counts = np.bincount(group_of_row, minlength=len(self.keys))
+        self.offsets = np.r_[0, np.cumsum(counts)]
+
+        # 名次：每段相同取值的第一个位置相对组起点的偏移 + 1
+        positions = np.arange(len(self.order))
+        new_run = np.r_[True, (sorted_groups[1:] != sorted_groups[:-1]) | (sorted_values[1:] != sorted_values[:-1])]
+        run_start = np.maximum.accumulate(np.where(new_run, positions, 0)) if len(positions) else positions
+        self.rank = np.zeros(n, dtype=np.int32)
+        self.size = np.zeros(n, dtype=np.int32)
+        self.percentile = np.full(n, np.nan)
+        self.rank[self.order] = run_start - self.offsets[sorted_groups] + 1
+        self.size[self.order] = counts[sorted_groups]
+        self.percentile[self.order] = (self.size[self.order] - self.rank[self.order] + 1) / self.size[self.order] * 100
+
+        # 排名变化：上一年名次 - 本年名次，正数表示上升；上一年未参与排名时为空值
+        previous, current = pairs
+        ranked = (self.rank[previous] > 0) & (self.rank[current] > 0)
+        self.change = np.full(n, np.nan)
+        self.change[current[ranked]] = self.rank[previous[ranked]] - self.rank[current[ranked]]
+
+        # 有排名变化的行按 (组, 变化降序, 本年名次) 连续存放
+        moved = self.order[~np.isnan(self.change[self.order])]
+        moved_groups = group_of_row[np.searchsorted(rows, moved)]
+        self.moves = moved[np.lexsort((self.rank[moved], -self.change[moved], moved_groups))]
+        self.move_offsets = np.r_[0, np.cumsum(np.bincount(moved_groups, minlength=len(self.keys)))]
+
+    def _slice(self, key, order, offsets):
+        i = self.group_index.get(key)
+        if i is None:
+            return order[:0]
+        return order[offsets[i]:offsets[i + 1]]
+
+    def top(self, key, n):
+        return self._slice(key, self.order, self.offsets)[:n]
+
+    def bottom(self, key, n):
+        # 名次最低的 n 行，最低的在前
+        return self._slice(key, self.order, self.offsets)[::-1][:n]
+
+    def risers(self, key, n):
+        # 名次上升最多的 n 行（只含上升的）
+        rows = self._slice(key, self.moves, self.move_offsets)[:n]
+        return rows[self.change[rows] > 0]
+
+    def fallers(self, key, n):
+        # 名次下降最多的 n 行（只含下降的），下降最多的在前
+        rows = self._slice(key, self.moves, self.move_offsets)[::-1][:n]
+        return rows[self.change[rows] < 0]
+
+
+class RankTable:
+    # 年份 × 行业内和年份内的排名；series 为 panel_series.CompanySeries，用于找出同一企业相邻两年的行
+
+    def __init__(self, df, series, column=INDEX_COLUMN):
+        self.column = column
+        year_codes, years = pd.factorize(df['年份'], sort=True)
+        industry_codes, industries = pd.factorize(df['行业名称'], sort=True)
+        self.years = years.tolist()
+        self.industries = [str(name) for name in industries]
+        self.year_index = {year: i for i, year in enumerate(self.years)}
+        self.industry_index = {name: i for i, name in enumerate(self.industries)}
+        self.n_industries = len(self.industries)
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # 按 (股票代码, 年份) 排序后相邻、属于同一企业且年份相差 1 的行对
+        order = series.order
+        codes = df['股票代码'].to_numpy()[order]
+        years_sorted = df['年份'].to_numpy()[order]
+        consecutive = (codes[1:] == codes[:-1]) & (years_sorted[1:].astype(np.int64) - years_sorted[:-1] == 1)
+        previous, current = order[:-1][consecutive], order[1:][consecutive]
+        # 行业内排名变化只比较两年行业相同的情况
+        same_industry = industry_codes[previous] == industry_codes[current]
+
+        industry_groups = np.where(industry_codes >= 0, year_codes.astype(np.int64) * self.n_industries + industry_codes, -1)
+        self.by_industry = RankGroups(industry_groups, values, (previous[same_industry], current[same_industry]))
+        self.by_year = RankGroups(year_codes.astype(np.int64), values, (previous, current))
+
+    def _groups(self, year, industry=None):
+        # (分组, 组键)；industry 为 None 时为整个年份
+        year_code = self.year_index.get(year, -1)
+        if industry is None:
+            return self.by_year, year_code
+        industry_code = self.industry_index.get(industry)
+        if year_code < 0 or industry_code is None:
+            return self.by_year, -1
+        return self.by_industry, year_code * self.n_industries + industry_code
+
+    def leaderboard(self, year, industry=None, n=10):
+        # {'top': 前 n 名, 'bottom': 后 n 名, 'risers': 上升最多, 'fallers': 下降最多}，均为原数据行号
+        groups, key = self._groups(year, industry)
+        return {
+            'top': groups.top(key, n),
+            'bottom': groups.bottom(key, n),
+            'risers': groups.risers(key, n),
+            'fallers': groups.fallers(key, n),
+        }
+
+    def columns(self, rows, prefixes=('行业', '年度')):
+        # 给定行的排名列 {列名: 数组}；prefixes 选择行业内、年份内两组中的哪些，未参与排名的行名次为空值
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = {}
+        for prefix in prefixes:
+            groups = self.by_industry if prefix == '行业' else self.by_year
+            rank = groups.rank[rows]
+            ranked = rank > 0
+            columns[f'{prefix}排名'] = pd.array(np.where(ranked, rank, np.nan), dtype='Int32')
+            columns[f'{prefix}企业数'] = pd.array(np.where(ranked, groups.size[rows], np.nan), dtype='Int32')
+            columns[f'{prefix}百分位'] = groups.percentile[rows]
+            columns[f'{prefix}排名变化'] = pd.array(groups.change[rows], dtype='Int32')
+        return columns
+
+    def table(self, rows, prefixes=('行业', '年度')):
+        return pd.DataFrame(self.columns(rows, prefixes))
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from panel_cube import INDEX_COLUMN, TECH_DIMENSIONS
+
+# 企业时间序列模块
+# 加载时把面板按 (股票代码, 年份) 排序，各度量列按这一顺序另存一份连续数组，并为每家企业记录起止偏移；
+# 任意企业 1999-2023 的完整轨迹都是一次字典查找加一段连续切片，多家企业的趋势对比不需要再扫描全表。
+
+# 保存为连续数组的度量列
+SERIES_COLUMNS = [INDEX_COLUMN] + TECH_DIMENSIONS + ['总词频数']
+
+
+class CompanySeries:
+
+    def __init__(self, df, columns=SERIES_COLUMNS):
+        codes = df['股票代码'].to_numpy()
+        years = df['年份'].to_numpy()
+        # 先按股票代码、再按年份排序；同一企业同一年份的重复行保持原始行序
+        self.order = np.lexsort((years, codes))
+        sorted_codes = codes[self.order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(codes) else np.empty(0, np.int64)
+        self.offsets = np.r_[starts, len(codes)]
+        self.codes = sorted_codes[starts]
+        self.integer_codes = pd.api.types.is_integer_dtype(codes.dtype)
+        self.position = {code: i for i, code in enumerate(self.codes.tolist())}
+        self.years = years[self.order]
+        self.columns = [col for col in columns if col in df.columns]
+        self.values = {col: df[col].to_numpy()[self.order] for col in self.columns}
+        # 每家企业最近一年的名称，用作显示标签
+        names = df['企业名称'].astype(object).to_numpy()[self.order]
+        self.names = names[self.offsets[1:] - 1] if len(codes) else np.empty(0, dtype=object)
+        code_texts = [f'{code:06d}' if self.integer_codes else str(code) for code in self.codes.tolist()]
+        self.labels = [f'{code} {name}' for code, name in zip(code_texts, self.names)]
+
+    def _key(self, code):
+        # '000001'、'1'、1 都指同一家企业（股票代码已归一为整数时）
+        if self.integer_codes:
+            text = str(code).strip()
+            return int(text) if text.lstrip('-').isdigit() else None
+        return str(code).strip()
+
+    def locate(self, code):
+        # 返回企业编号，不存在时为 None
+        key = self._key(code)
+        return self.position.get(key) if key is not None else None
+
+    def rows(self, code):
+        # 该企业在原数据中的行号，按年份升序
+        i = self.locate(code)
+        if i is None:
+            return np.empty(0, dtype=self.order.dtype)
+        return self.order[self.offsets[i]:self.offsets[i + 1]]
+
+    def trajectory(self, code, columns=None):
+        # 单家企业各年份的度量值（年份为索引），直接取连续切片
+        columns = self.columns if columns is None else list(columns)
+        i = self.locate(code)
+        start, stop = (self.offsets[i], self.offsets[i + 1]) if i is not None else (0, 0)
+        return pd.DataFrame({col: self.values[col][start:stop] for col in columns},
+                            index=pd.Index(self.years[start:stop], name='年份'))
+
+    def find(self, codes):
+        # 数据中存在的企业的股票代码（去重，保持输入顺序）
+        found = dict.fromkeys(i for i in map(self.locate, codes) if i is not None)
+        return [self.codes[i].item() for i in found]
+
+    def label(self, code):
+        # "股票代码 企业名称"，企业不存在时原样返回
+        i = self.locate(code)
+        return self.labels[i] if i is not None else str(code)
+
+    def trends(self, codes, column=INDEX_COLUMN):
+        # 多家企业某一度量的宽表：行为年份，列为企业标签；某年没有数据的企业为空值，同一年份有多行时取均值
+        slices = []
+        for code in codes:
+            i = self.locate(code)
+            if i is not None and all(i != j for j, _ in slices):
+                slices.append((i, slice(self.offsets[i], self.offsets[i + 1])))
+        if not slices:
+            return pd.DataFrame(index=pd.Index([], name='年份'))
+        year_parts = [self.years[part] for _, part in slices]
+        years = np.unique(np.concatenate(year_parts))
+        sums = np.zeros((len(years), len(slices)))
+        counts = np.zeros((len(years), len(slices)))
+        for j, ((_, part), company_years) in enumerate(zip(slices, year_parts)):
+            positions = np.searchsorted(years, company_years)
+            np.add.at(sums[:, j], positions, self.values[column][part])
+            np.add.at(counts[:, j], positions, 1)
+        with np.errstate(invalid='ignore'):
+            grid = sums / counts
+        labels = [self.labels[i] for i, _ in slices]
+        return pd.DataFrame(grid, index=pd.Index(years, name='年份'), columns=labels)
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import math
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+from panel_query import PanelQuery
+
+# 本地 JSON 查询接口
+# 用法：python panel_server.py [--data 合并表.xlsx] [--host 127.0.0.1] [--port 8765]
+# 进程启动时加载一次面板，之后每个请求只调用 panel_query 中的查询函数，不经过 Streamlit 的页面重新运行。
+# 所有接口都是 GET，筛选条件通过查询参数传入，多个取值用逗号分隔：
+#   years=2020,2021  industries=软件和信息技术服务业  stock_codes=600008  name_terms=首创
+# 参数缺省表示不按该维度筛选，参数为空（如 years=）表示没有匹配，与仪表盘的筛选规则一致。
+#   /health                        面板行数、数据哈希
+#   /summary                       顶部指标
+#   /industries?top=20&column=     行业平均值排名
+#   /provinces?column=             各省份平均指数与企业数量
+#   /measures?columns=             各列均值（默认为五个技术维度）
+#   /year-means?columns=           按 years 顺序的各年份均值
+#   /correlation                   相关矩阵
+#   /top?n=10&column=&ranks=1      指数最高的企业（ranks=1 时附加行业内、年份内的名次和百分位）
+#   /rows?page=1&page_size=50&sort=总词频数&order=desc   筛选结果分页
+#   /companies/<股票代码>/history?ranks=1   单家企业各年份数据
+#   /companies/trends?stock_codes=600008,000001&column=   多家企业某一度量的逐年数据
+#   /leaderboard?year=2023&industry=软件和信息技术服务业&n=10   排行榜（前 n 名、后 n 名、名次上升/下降最多），不给 industry 时为当年全部企业
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_PATH = os.path.join(BASE_DIR, '1999-2023年数字化转型指数与行业合并表.xlsx')
+
+# 单次分页请求、/top、/leaderboard 和 /industries 的 top 的最大行数
+MAX_PAGE_SIZE = 1000
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def parse_filters(params):
+    # 查询参数 -> PanelQuery 的筛选参数
+    filters = {}
+    if 'years' in params:
+        filters['years'] = [int(year) for year in _split(params['years'])]
+    for name in ('industries', 'stock_codes', 'name_terms'):
+        if name in params:
+            filters[name] = _split(params[name])
+    return filters
+
+
+def to_jsonable(value):
+    # DataFrame 转为记录列表，Series 转为字典；numpy 标量转为 Python 类型，NaN 转为 null
+    if isinstance(value, pd.DataFrame):
+        return [{str(k): to_jsonable(v) for k, v in record.items()} for record in value.to_dict('records')]
+    if isinstance(value, pd.Series):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    # 保持连接，客户端可以在一个连接上连续发送请求；响应头和正文分两次写出，关闭 Nagle 算法以免每个请求多等一次延迟确认
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    query = None
+    verbose = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        parts = [part for part in url.path.split('/') if part]
+        try:
+            body = self.route(parts, params)
+        except LookupError as e:
+            self.send_json(404, {'error': str(e)})
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {'error': str(e)})
+        else:
+            self.send_json(200, body)
+
+    def route(self, parts, params):
+        query = self.query
+        filters = parse_filters(params)
+        column = params.get('column', '数字化转型指数(0-100分)')
+        if parts == ['health']:
+            return {'status': 'ok', 'rows': len(query.df), 'sha256': query.load_info.get('sha256')}
+        if parts == ['summary']:
+            return to_jsonable(query.summary(**filters))
+        if parts == ['industries']:
+            top = self._count(params, 'top') if params.get('top') else None
+            return to_jsonable(query.industry_ranking(self._column(column), top=top, **filters))
+        if parts == ['provinces']:
+            return to_jsonable(query.province_averages(self._column(column), **filters))
+        if parts == ['measures']:
+            return to_jsonable(query.measure_means(self._columns(params), **filters))
+        if parts == ['year-means']:
+            return [{'年份': year, **dict(zip(self._columns(params), to_jsonable(values)))}
+                    for year, values in query.year_means(self._columns(params), **filters)]
+        if parts == ['correlation']:
+            return to_jsonable(query.correlation(**filters).to_dict())
+        if parts == ['top']:
+            return to_jsonable(query.top_companies(self._count(params), self._column(column),
+                                                   params.get('ranks') == '1', **filters))
+        if parts == ['rows']:
+            page = int(params.get('page', 1))
+            page_size = int(params.get('page_size', 50))
+            if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+                raise ValueError(f'page 从 1 开始，page_size 为 1 到 {MAX_PAGE_SIZE}')
+            sort = params.get('sort') or None
+            if sort is not None and (sort, True) not in query.sort_index.orders:
+                raise ValueError(f'不支持按 {sort} 排序')
+            rows = query.page(page, page_size, sort, params.get('order', 'desc') == 'desc', **filters)
+            return {'total': len(query.select(**filters)), 'page': page, 'rows': to_jsonable(rows)}
+        if parts == ['companies', 'trends']:
+            if not params.get('stock_codes'):
+                raise ValueError('缺少 stock_codes 参数')
+            trends = query.company_trends(_split(params['stock_codes']), self._column(column))
+            return {'years': to_jsonable(trends.index.to_numpy()),
+                    'companies': {label: to_jsonable(trends[label].to_numpy()) for label in trends.columns}}
+        if len(parts) == 3 and parts[0] == 'companies' and parts[2] == 'history':
+            return to_jsonable(query.company_history(parts[1], with_ranks=params.get('ranks') == '1'))
+        if parts == ['leaderboard']:
+            if not params.get('year'):
+                raise ValueError('缺少 year 参数')
+            boards = query.leaderboard(int(params['year']), params.get('industry') or None, self._count(params))
+            return {name: to_jsonable(board) for name, board in boards.items()}
+        raise LookupError(f'未知接口：/{"/".join(parts)}')
+
+    def _column(self, column):
+        if column not in self.query.df.columns or not pd.api.types.is_numeric_dtype(self.query.df[column]):
+            raise ValueError(f'不是数值列：{column}')
+        return column
+
+    def _count(self, params, key='n', default=10):
+        # /top、/leaderboard 的返回行数和 /industries 的 top，与分页大小的上限相同
+        n = int(params.get(key, default))
+        if not 1 <= n <= MAX_PAGE_SIZE:
+            raise ValueError(f'{key} 为 1 到 {MAX_PAGE_SIZE}')
+        return n
+
+    def _columns(self, params):
+        columns = _split(params['columns']) if params.get('columns') else ['人工智能', '大数据', '云计算', '物联网', '区块链']
+        return [self._column(column) for column in columns]
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(query, host='127.0.0.1', port=8765, verbose=False):
+    handler = type('PanelQueryHandler', (QueryHandler,), {'query': query, 'verbose': verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='数字化转型指数本地 JSON 查询接口')
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH, help='合并表路径')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址，默认只接受本机请求')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--verbose', action='store_true', help='打印每个请求')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.data):
+        print(f'数据文件不存在：{args.data}')
+        return 1
+    query = PanelQuery.from_file(args.data)
+    server = make_server(query, args.host, args.port, args.verbose)
+    print(f'已加载 {len(query.df):,} 行，正在监听 http://{args.host}:{args.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+from functools import lru_cache
+from keyword_automaton import KeywordAutomaton
+
+# 省份匹配模块
+# 用 Aho-Corasick 自动机（keyword_automaton.py）一次扫描企业名称，找出所有出现的省份/城市关键词，
+# 再按映射表中的先后顺序取第一个，结果与逐个关键词做子串判断完全一致。
+
+# 中国省份、城市和简称映射
+provinces_cities_mapping = {
+    # 省份和直辖市
+    '北京': '北京', '上海': '上海', '广东': '广东', '江苏': '江苏', '浙江': '浙江', '山东': '山东',
+    '福建': '福建', '河南': '河南', '湖北': '湖北', '湖南': '湖南', '四川': '四川', '河北': '河北',
+    '安徽': '安徽', '江西': '江西', '辽宁': '辽宁', '陕西': '陕西', '山西': '山西', '黑龙江': '黑龙江',
+    '吉林': '吉林', '云南': '云南', '贵州': '贵州', '广西': '广西', '天津': '天津', '重庆': '重庆',
+    '内蒙古': '内蒙古', '新疆': '新疆', '甘肃': '甘肃', '宁夏': '宁夏', '青海': '青海', '西藏': '西藏',
+    '海南': '海南', '香港': '香港', '澳门': '澳门', '台湾': '台湾',
+    # 主要城市
+    '深圳': '广东', '广州': '广东', '杭州': '浙江', '南京': '江苏', '青岛': '山东', '济南': '山东',
+    '苏州': '江苏', '宁波': '浙江', '厦门': '福建', '福州': '福建', '成都': '四川', '武汉': '湖北',
+    '长沙': '湖南', '西安': '陕西', '郑州': '河南', '沈阳': '辽宁', '大连': '辽宁', '长春': '吉林',
+    '哈尔滨': '黑龙江', '合肥': '安徽', '南昌': '江西', '石家庄': '河北', '太原': '山西', '昆明': '云南',
+    '贵阳': '贵州', '南宁': '广西', '乌鲁木齐': '新疆', '兰州': '甘肃', '银川': '宁夏', '西宁': '青海',
+    '拉萨': '西藏', '海口': '海南', '三亚': '海南',
+    # 新增城市（根据数据分析结果）
+    '东莞': '广东', '佛山': '广东', '惠州': '广东', '中山': '广东', '珠海': '广东',
+    '无锡': '江苏', '徐州': '江苏', '常州': '江苏', '南通': '江苏', '连云港': '江苏',
+    '温州': '浙江', '绍兴': '浙江', '嘉兴': '浙江', '金华': '浙江', '台州': '浙江', '湖州': '浙江',
+    '泉州': '福建', '漳州': '福建', '莆田': '福建', '宁德': '福建', '龙岩': '福建',
+    '烟台': '山东', '潍坊': '山东', '淄博': '山东', '济宁': '山东', '泰安': '山东', '临沂': '山东',
+    '岳阳': '湖南', '衡阳': '湖南', '株洲': '湖南', '湘潭': '湖南', '常德': '湖南',
+    '沧州': '河北', '唐山': '河北', '保定': '河北', '廊坊': '河北', '承德': '河北',
+    '大同': '山西', '阳泉': '山西', '长治': '山西', '晋城': '山西', '临汾': '山西',
+    '乐山': '四川', '泸州': '四川', '德阳': '四川', '绵阳': '四川', '宜宾': '四川', '广安': '四川', '眉山': '四川',
+    '襄阳': '湖北', '宜昌': '湖北', '荆州': '湖北', '黄冈': '湖北',
+    '九江': '江西', '赣州': '江西', '上饶': '江西', '宜春': '江西',
+    '包头': '内蒙古', '呼和浩特': '内蒙古',
+    '洛阳': '河南', '开封': '河南', '新乡': '河南', '安阳': '河南',
+    '锦州': '辽宁', '营口': '辽宁',
+    '遵义': '贵州', '六盘水': '贵州',
+    '柳州': '广西', '桂林': '广西',
+    '曲靖': '云南', '玉溪': '云南',
+    '咸阳': '陕西', '宝鸡': '陕西',
+    '芜湖': '安徽', '马鞍山': '安徽',
+    '大庆': '黑龙江', '齐齐哈尔': '黑龙江',
+    '吉林': '吉林', '四平': '吉林'
+}
+
+# 无法提取省份信息时的默认值
+DEFAULT_PROVINCE = '全国'
+
+
+# 自动机在模块加载时构建一次
+_province_keys = list(provinces_cities_mapping)
+_province_automaton = KeywordAutomaton(_province_keys)
+
+
+# 从企业名称中提取省份信息（按企业名称记忆化）
+@lru_cache(maxsize=None)
+def extract_province(company_name):
+    matched = _province_automaton.first_match(company_name)
+    if matched is None:
+        # 如果无法提取省份信息，返回默认省份
+        return DEFAULT_PROVINCE
+    return provinces_cities_mapping[_province_keys[matched]]
+
+
+def province_column(company_names):
+    # 对整列企业名称提取省份：每个不同的名称只匹配一次
+    unique_names = company_names.dropna().unique()
+    lookup = {name: extract_province(name) for name in unique_names}
+    return company_names.map(lookup).fillna(DEFAULT_PROVINCE)
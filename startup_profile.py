@@ -0,0 +1,91 @@
+import os
+import sys
+import ast
+import json
+import time
+import argparse
+import subprocess
+
+# 启动导入耗时分析
+# 用法：python startup_profile.py [--top 15]
+# 在全新的解释器中依次执行应用脚本顶层的全部 import 语句，逐条记录增量耗时（前面语句已加载的依赖不重复计入），
+# 再测出延迟到各页面分段中才导入的图表、地图库的额外耗时；--top 另外列出 -X importtime 统计的自身耗时最多的模块。
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_DIR, 'digital_transformation_app.py')
+
+# 延迟导入的库及其首次导入的时机
+DEFERRED_IMPORTS = [
+    ('import matplotlib.pyplot', '第一次绘制图表'),
+    ('import seaborn', '第一次绘制条形图或热力图'),
+    ('import folium', '第一次生成地图'),
+    ('import plotly.express', '勾选"显示Plotly版本图表"'),
+]
+
+
+def app_imports(path=APP_PATH):
+    # 应用脚本顶层的 import 语句（源码文本），函数内部的延迟导入不包括在内
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    return [ast.get_source_segment(source, node) for node in ast.parse(source).body
+            if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def _time_statements(statements):
+    # 在当前解释器中依次执行，返回 [(语句, 秒), ...]
+    results = []
+    for statement in statements:
+        start = time.perf_counter()
+        exec(statement, {})
+        results.append((statement, time.perf_counter() - start))
+    return results
+
+
+def profile_statements(statements):
+    # 在全新的子进程中计时，不受当前进程已导入模块的影响
+    code = ('import sys, json, startup_profile; '
+            'print(json.dumps(startup_profile._time_statements(json.loads(sys.argv[1]))))')
+    output = subprocess.run([sys.executable, '-c', code, json.dumps(statements)], cwd=BASE_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def top_modules(statements, top):
+    # 解析 -X importtime 的输出，按模块自身耗时（微秒）降序返回 [(模块, 自身, 累计), ...]
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', '\n'.join(statements)], cwd=BASE_DIR,
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return modules[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='统计应用启动时各 import 语句的耗时')
+    parser.add_argument('--top', type=int, default=0, help='另外列出自身导入耗时最多的 N 个模块')
+    args = parser.parse_args(argv)
+
+    statements = app_imports()
+    timings = profile_statements(statements + [statement for statement, _ in DEFERRED_IMPORTS])
+    startup, deferred = timings[:len(statements)], timings[len(statements):]
+
+    print(f'应用启动导入（共 {sum(seconds for _, seconds in startup):.3f} 秒）')
+    for statement, seconds in startup:
+        print(f'  {seconds:8.3f} 秒  {statement}')
+    print(f'\n延迟导入（共 {sum(seconds for _, seconds in deferred):.3f} 秒，在对应分段首次运行时才加载）')
+    for (statement, seconds), (_, when) in zip(deferred, DEFERRED_IMPORTS):
+        print(f'  {seconds:8.3f} 秒  {statement:28s} {when}')
+
+    if args.top:
+        print(f'\n启动时自身导入耗时最多的 {args.top} 个模块（毫秒，自身 / 累计）')
+        for name, self_us, cumulative_us in top_modules(statements, args.top):
+            print(f'  {self_us / 1000:8.1f} / {cumulative_us / 1000:8.1f}  {name}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
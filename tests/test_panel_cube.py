@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from panel_cube import CorrelationStats, CORRELATION_COLUMNS
+
+# CorrelationStats.corr 与 pandas 逐行 .corr() 的一致性
+
+
+def make_panel(integer=True, seed=0):
+    rng = np.random.default_rng(seed)
+    n = 400
+    df = pd.DataFrame({
+        '年份': rng.choice([2019, 2020, 2021, 2022], n).astype(np.int16),
+        '行业名称': pd.Categorical(rng.choice(['软件', '制造', '金融', None], n, p=[0.4, 0.3, 0.2, 0.1])),
+    })
+    for col in CORRELATION_COLUMNS:
+        values = rng.integers(0, 100, n)
+        df[col] = values.astype(np.int16) if integer else values + rng.random(n)
+    # 2019 年的金融行业各列为常数
+    constant = (df['年份'] == 2019) & (df['行业名称'] == '金融')
+    df.loc[constant, CORRELATION_COLUMNS[1]] = 7
+    # 2022 年的制造行业只保留一行
+    single = np.flatnonzero((df['年份'] == 2022) & (df['行业名称'] == '制造'))
+    return df.drop(index=df.index[single[1:]]).reset_index(drop=True)
+
+
+def expected(df, years, industries):
+    mask = np.ones(len(df), dtype=bool)
+    if years is not None:
+        mask &= df['年份'].isin(years).to_numpy()
+    if industries is not None:
+        mask &= df['行业名称'].isin(industries).to_numpy()
+    return df.loc[mask, CORRELATION_COLUMNS].corr()
+
+
+SELECTIONS = [
+    (None, None),                   # 全部行（含行业缺失的行）
+    ([2020, 2021], None),
+    (None, ['软件', '金融']),
+    ([2021], ['制造']),
+    ([2019], ['金融']),             # 有一列为常数
+    ([2022], ['制造']),             # 只有一行
+    ([2018], None),                 # 没有匹配的年份
+    ([2020], []),                   # 空行业列表
+]
+
+
+@pytest.mark.parametrize('integer', [True, False])
+@pytest.mark.parametrize('years, industries', SELECTIONS)
+def test_corr_matches_pandas(integer, years, industries):
+    df = make_panel(integer)
+    result = CorrelationStats(df).corr(years, industries)
+    reference = expected(df, years, industries)
+    assert list(result.index) == list(reference.index)
+    assert list(result.columns) == list(reference.columns)
+    # 缺失值的位置一致，其余取值一致
+    np.testing.assert_array_equal(np.isnan(result.to_numpy()), np.isnan(reference.to_numpy()))
+    np.testing.assert_allclose(result.to_numpy(), reference.to_numpy(), rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_constant_and_degenerate_selections_are_nan():
+    df = make_panel()
+    stats = CorrelationStats(df)
+    constant = stats.corr([2019], ['金融'])
+    assert constant[CORRELATION_COLUMNS[1]].isna().all()
+    assert constant.loc[CORRELATION_COLUMNS[0], CORRELATION_COLUMNS[0]] == 1.0
+    assert stats.corr([2022], ['制造']).isna().all().all()
+    assert stats.corr([2018], None).isna().all().all()
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from panel_data import freeze_panel, panel_view
+
+# 共享面板只读、会话浅拷贝的隔离
+
+
+def make_panel():
+    return pd.DataFrame({
+        '年份': np.array([2021, 2022, 2023], dtype=np.int16),
+        '行业名称': pd.Categorical(['软件', '制造', '软件']),
+        '人工智能': np.array([1, 2, 3], dtype=np.int16),
+    })
+
+
+def make_shared():
+    return freeze_panel(make_panel())
+
+
+def test_shared_panel_rejects_value_writes():
+    # 未冻结的面板可以原地写入，冻结后同样的写入报错
+    unfrozen = make_panel()
+    unfrozen.loc[0, '人工智能'] = 9
+    assert unfrozen.loc[0, '人工智能'] == 9
+
+    shared = make_shared()
+    with pytest.raises(ValueError):
+        shared.loc[0, '人工智能'] = 9
+    assert shared.loc[0, '人工智能'] == 1
+
+
+def test_view_changes_do_not_reach_shared_panel():
+    shared = make_shared()
+    view = panel_view(shared)
+    view['新列'] = 1
+    view.drop(columns=['年份'], inplace=True)
+    view.loc[0, '人工智能'] = 99
+    view.sort_values('人工智能', ascending=False, inplace=True)
+    assert list(shared.columns) == ['年份', '行业名称', '人工智能']
+    assert shared['人工智能'].tolist() == [1, 2, 3]
+    assert shared.index.tolist() == [0, 1, 2]
+
+
+def test_view_shares_data():
+    shared = make_shared()
+    view = panel_view(shared)
+    assert np.shares_memory(view['人工智能'].to_numpy(), shared['人工智能'].to_numpy())
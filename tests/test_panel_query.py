@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from panel_cube import CORRELATION_COLUMNS, TECH_DIMENSIONS
+from panel_query import PanelQuery
+
+# 立方体没有保存的列（总词频数）在立方体路径和逐行路径上都按行计算
+
+
+def make_query(seed=0):
+    rng = np.random.default_rng(seed)
+    n = 300
+    codes = rng.integers(1, 60, n)
+    df = pd.DataFrame({
+        '年份': rng.choice([2020, 2021, 2022], n).astype(np.int16),
+        '股票代码': codes,
+        '企业名称': [f'企业{code}' for code in codes],
+        '行业名称': pd.Categorical(rng.choice(['软件', '制造', '金融'], n)),
+        '省份': pd.Categorical(rng.choice(['北京', '上海', '广东'], n)),
+    })
+    for col in CORRELATION_COLUMNS:
+        df[col] = rng.integers(0, 100, n).astype(np.int16)
+    df = df.drop_duplicates(['股票代码', '年份']).reset_index(drop=True)
+    return PanelQuery(df), df
+
+
+# 只按年份筛选时走立方体，带股票代码时逐行计算（这里选中全部企业，两条路径结果应相同）
+PATHS = {'cube': {}, 'rows': {'stock_codes': [str(code) for code in range(1, 60)]}}
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_non_cube_column_aggregates(path):
+    query, df = make_query()
+    filters = dict(years=[2020], **PATHS[path])
+    assert query.uses_cube(**filters) == (path == 'cube')
+    subset = df[df['年份'] == 2020]
+
+    ranking = query.industry_ranking('总词频数', top=3, **filters)
+    reference = subset.groupby('行业名称', observed=True)['总词频数'].mean().sort_values(ascending=False)
+    assert list(ranking['行业名称']) == [str(name) for name in reference.index]
+    np.testing.assert_allclose(ranking['总词频数'].to_numpy(), reference.to_numpy())
+
+    provinces = query.province_averages('总词频数', **filters).set_index('省份')
+    reference = subset.groupby('省份', observed=True)['总词频数'].mean()
+    np.testing.assert_allclose(provinces.loc[reference.index.astype(str), '平均数字化转型指数'], reference.to_numpy())
+
+    columns = TECH_DIMENSIONS + ['总词频数']
+    np.testing.assert_allclose(query.measure_means(columns, **filters).to_numpy(), subset[columns].mean().to_numpy())
+    [(year, means)] = query.year_means(columns, **filters)
+    assert year == 2020
+    np.testing.assert_allclose(means, subset[columns].mean().to_numpy())